@@ -1,19 +1,74 @@
 from sqlmodel import SQLModel, create_engine, Session
-from sqlalchemy.pool import StaticPool
+from sqlmodel.pool import StaticPool
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 import os
 
-# SQLite database URL
-DATABASE_URL = "sqlite:///./ori_api.db"
+# Database URL; defaults to a local SQLite file
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ori_api.db")
 
 # Server configuration
 API_SERVER = os.getenv("API_SERVER", "http://localhost:8000")
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
+# Connection pool size per engine; sync endpoints run in a threadpool of the same capacity (see main.py)
+POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "20"))
+
+# Database URL for the GET endpoints, e.g. a read replica; defaults to DATABASE_URL
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", DATABASE_URL)
+
+
+def _create_engine(url: str, readonly: bool = False):
+    """Create an engine for the given URL, with SQLite tuned for concurrent readers"""
+    parsed_url = make_url(url)
+    is_sqlite = parsed_url.get_backend_name() == "sqlite"
+    
+    if is_sqlite and parsed_url.database in (None, "", ":memory:"):
+        # An in-memory database only exists within its connection, so share that one connection
+        new_engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    else:
+        # Create engine with a connection pool, so concurrent requests no longer share one connection
+        new_engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False} if is_sqlite else {},
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_pre_ping=True,
+        )
+    
+    if is_sqlite:
+        @event.listens_for(new_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            """Enable WAL mode so readers don't block each other or the writer"""
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.execute("PRAGMA mmap_size=268435456")
+            cursor.execute("PRAGMA cache_size=-64000")
+            if readonly:
+                cursor.execute("PRAGMA query_only=ON")
+            cursor.close()
+    elif readonly and parsed_url.get_backend_name() == "postgresql":
+        new_engine = new_engine.execution_options(postgresql_readonly=True)
+    
+    return new_engine
+
+
+engine = _create_engine(DATABASE_URL)
+
+# Without a separate read URL the GET endpoints share the writer's engine and pool
+if DATABASE_READ_URL == DATABASE_URL:
+    read_engine = engine
+else:
+    read_engine = _create_engine(DATABASE_READ_URL, readonly=True)
+
+# Number of connections the engines can hand out at once
+CONNECTION_CAPACITY = (POOL_SIZE + MAX_OVERFLOW) * (1 if read_engine is engine else 2)
 
 
 def create_db_and_tables():
@@ -24,4 +79,10 @@ def create_db_and_tables():
 def get_session():
     """Dependency for getting database sessions"""
     with Session(engine) as session:
+        yield session
+
+
+def get_read_session():
+    """Dependency for getting database sessions for the read-only GET endpoints"""
+    with Session(read_engine) as session:
         yield session
\ No newline at end of file
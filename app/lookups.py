@@ -0,0 +1,50 @@
+import uuid
+from typing import Optional, Type, TypeVar
+from fastapi import HTTPException, status
+from sqlmodel import Session, SQLModel, select
+
+# Any of the table models with a unique pid_uuid column
+Model = TypeVar("Model", bound=SQLModel)
+
+
+def get_or_404(session: Session, model: Type[Model], id: uuid.UUID, *options) -> Model:
+    """Look up a resource by its unique pid_uuid"""
+    statement = select(model).where(model.pid_uuid == str(id))
+    if options:
+        statement = statement.options(*options)
+    resource = session.exec(statement).one_or_none()
+    
+    if not resource:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="De gevraagde resource is niet gevonden.",
+        )
+    return resource
+
+
+def ensure_pid_uuid_free(session: Session, model: Type[Model], pid_uuid: str) -> None:
+    """Refuse a pid_uuid that an existing resource of the model already uses"""
+    statement = select(model.id).where(model.pid_uuid == pid_uuid)
+    if session.exec(statement).first() is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="De pid_uuid is al in gebruik door een andere resource.",
+        )
+
+
+def updated_pid_uuid(session: Session, model: Type[Model], current: str, requested: Optional[str]) -> str:
+    """The canonical pid_uuid to store on an update, so the resource stays reachable under its /{id}"""
+    if not requested:
+        return current
+    try:
+        pid_uuid = str(uuid.UUID(requested))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="De pid_uuid is geen geldige UUID.",
+        )
+    
+    # pid_uuid is unique, so taking over another resource's is a conflict rather than a server error
+    if pid_uuid != current:
+        ensure_pid_uuid_free(session, model, pid_uuid)
+    return pid_uuid
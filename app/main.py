@@ -1,8 +1,11 @@
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html, get_swagger_ui_oauth2_redirect_html
 from contextlib import asynccontextmanager
+from functools import lru_cache
+from anyio import to_thread
+import orjson
 import uvicorn
 import os
 import sys
@@ -14,29 +17,20 @@ if __package__ in (None, ""):
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
 
-from app.database import create_db_and_tables
+from app.database import create_db_and_tables, CONNECTION_CAPACITY
+from app.responses import ORJSONResponse, PrettyJSONMiddleware
 from app.routers import agendapunten, informatieobjecten, vergaderingen
 
 
-class PrettyJSONResponse(JSONResponse):
-    """Custom JSON response with indentation"""
-    media_type = "application/json"
-    
-    def render(self, content) -> bytes:
-        import json
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=2,
-            separators=(", ", ": "),
-        ).encode("utf-8")
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize database on startup"""
     create_db_and_tables()
+    # The endpoints use a sync Session and run in the threadpool; one thread per pooled
+    # connection lets every connection be used without threads blocking on pool checkout
+    to_thread.current_default_thread_limiter().total_tokens = CONNECTION_CAPACITY
+    # Build and serialize the OpenAPI schema once, before the first request
+    openapi_json()
     yield
 
 
@@ -57,7 +51,11 @@ app = FastAPI(
         {"url": "http://127.0.0.1:8000", "description": "Local development server"}
     ],
     lifespan=lifespan,
-    default_response_class=PrettyJSONResponse,
+    default_response_class=ORJSONResponse,
+    # Served below from a cached, pre-serialized schema
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None,
 )
 
 # CORS middleware
@@ -69,14 +67,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compact JSON by default; ?pretty=1 indents the response
+app.add_middleware(PrettyJSONMiddleware)
+
 # Include routers
 app.include_router(agendapunten.router)
 app.include_router(informatieobjecten.router)
 app.include_router(vergaderingen.router)
 
 
+# One serialized schema per root_path; there are only as many as there are proxies in front of the app
+@lru_cache(maxsize=16)
+def openapi_json(root_path: str = "") -> bytes:
+    """The OpenAPI schema, serialized once; all routers are included before it is first built"""
+    schema = app.openapi()
+    # Like FastAPI's built-in /openapi.json, list the root_path of a proxy as the first server
+    servers = schema.get("servers", [])
+    if root_path and app.root_path_in_servers and root_path not in {server["url"] for server in servers}:
+        schema = {**schema, "servers": [{"url": root_path}, *servers]}
+    return orjson.dumps(schema)
+
+
+@app.get("/openapi.json", include_in_schema=False)
+async def openapi(request: Request):
+    root_path = request.scope.get("root_path", "").rstrip("/")
+    return Response(openapi_json(root_path), media_type="application/json")
+
+
+# Like FastAPI's built-in docs, the URLs in the pages include the root_path of a proxy
+@app.get("/docs", include_in_schema=False)
+async def swagger_ui(request: Request):
+    root_path = request.scope.get("root_path", "").rstrip("/")
+    return get_swagger_ui_html(
+        openapi_url=root_path + "/openapi.json",
+        title=f"{app.title} - Swagger UI",
+        oauth2_redirect_url=root_path + "/docs/oauth2-redirect",
+    )
+
+
+@app.get("/docs/oauth2-redirect", include_in_schema=False)
+async def swagger_ui_redirect():
+    return get_swagger_ui_oauth2_redirect_html()
+
+
+@app.get("/redoc", include_in_schema=False)
+async def redoc(request: Request):
+    root_path = request.scope.get("root_path", "").rstrip("/")
+    return get_redoc_html(openapi_url=root_path + "/openapi.json", title=f"{app.title} - ReDoc")
+
+
 @app.get("/")
-def root():
+async def root():
     """Root endpoint"""
     return {
         "message": "ORI API voor Open Overheid",
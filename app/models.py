@@ -1,13 +1,47 @@
 from typing import Optional, List
 from datetime import datetime, date
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Column, Index, LargeBinary
+from sqlalchemy.types import TypeDecorator
 from enum import Enum
+import uuid
+
+
+class UUIDBlob(TypeDecorator):
+    """UUID string stored in 16 bytes instead of 36 characters of text.
+
+    A BLOB on SQLite and a BYTEA on PostgreSQL. Values that are not a valid UUID are
+    refused, so callers validate ids before they reach a query.
+    """
+    impl = LargeBinary(16)
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return uuid.UUID(str(value)).bytes
+        except ValueError:
+            raise ValueError(f"Not a valid UUID: {value!r}") from None
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # A database created before the BLOB column still has the uuid as text
+        if isinstance(value, str):
+            return str(uuid.UUID(value))
+        # PostgreSQL drivers return a memoryview for BYTEA
+        return str(uuid.UUID(bytes=bytes(value)))
 
 
 # Junction table for many-to-many relationship
 class AgendapuntInformatieObjectLink(SQLModel, table=True):
     """Link table between agendapunten and informatieobjecten"""
     __tablename__ = "agendapunt_informatieobject_link"
+    __table_args__ = (
+        # The primary key serves lookups by agendapunt; this one serves lookups by informatieobject
+        Index("ix_link_informatieobject_agendapunt", "informatieobject_id", "agendapunt_id"),
+    )
     
     agendapunt_id: Optional[int] = Field(default=None, foreign_key="agendapunten.id", primary_key=True)
     informatieobject_id: Optional[int] = Field(default=None, foreign_key="informatieobjecten.id", primary_key=True)
@@ -17,10 +51,14 @@ class AgendapuntInformatieObjectLink(SQLModel, table=True):
 class AgendapuntDB(SQLModel, table=True):
     """Agendapunt database model"""
     __tablename__ = "agendapunten"
+    __table_args__ = (
+        # Agendapunten are listed per vergadering in id order
+        Index("ix_agendapunt_verg_id", "vergadering_id", "id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     pid: str = Field(index=True, unique=True)
-    pid_uuid: Optional[str] = Field(default=None, index=True)
+    pid_uuid: Optional[str] = Field(default=None, sa_column=Column(UUIDBlob, index=True, unique=True))
     webpaginalink: Optional[str] = None
     
     # Organisatie fields (simplified - stored as JSON-like fields)
@@ -31,7 +69,7 @@ class AgendapuntDB(SQLModel, table=True):
     dossiertype: str
     agendapuntnaam: str
     vergadering_id: Optional[int] = Field(default=None, foreign_key="vergaderingen.id")
-    hoofdagendapunt_id: Optional[int] = Field(default=None, foreign_key="agendapunten.id")
+    hoofdagendapunt_id: Optional[int] = Field(default=None, foreign_key="agendapunten.id", index=True)
     
     omschrijving: Optional[str] = None
     volgnummer: Optional[str] = None
@@ -59,7 +97,8 @@ class AgendapuntDB(SQLModel, table=True):
     subagendapunten: List["AgendapuntDB"] = Relationship(back_populates="hoofdagendapunt")
     informatieobjecten: List["InformatieObjectDB"] = Relationship(
         back_populates="agendapunten",
-        link_model=AgendapuntInformatieObjectLink
+        link_model=AgendapuntInformatieObjectLink,
+        sa_relationship_kwargs={"order_by": "InformatieObjectDB.id"}
     )
 
 
@@ -69,7 +108,7 @@ class InformatieObjectDB(SQLModel, table=True):
     
     id: Optional[int] = Field(default=None, primary_key=True)
     pid: str = Field(index=True, unique=True)
-    pid_uuid: Optional[str] = Field(default=None, index=True)
+    pid_uuid: Optional[str] = Field(default=None, index=True, unique=True)
     webpaginalink: str
     
     # Organisatie fields
@@ -97,7 +136,8 @@ class InformatieObjectDB(SQLModel, table=True):
     # Relationships
     agendapunten: List["AgendapuntDB"] = Relationship(
         back_populates="informatieobjecten",
-        link_model=AgendapuntInformatieObjectLink
+        link_model=AgendapuntInformatieObjectLink,
+        sa_relationship_kwargs={"order_by": "AgendapuntDB.id"}
     )
 
 
@@ -107,7 +147,7 @@ class VergaderingDB(SQLModel, table=True):
     
     id: Optional[int] = Field(default=None, primary_key=True)
     pid: str = Field(index=True, unique=True)
-    pid_uuid: Optional[str] = Field(default=None, index=True)
+    pid_uuid: Optional[str] = Field(default=None, index=True, unique=True)
     webpaginalink: Optional[str] = None
     
     # Organisatie fields
@@ -120,7 +160,7 @@ class VergaderingDB(SQLModel, table=True):
     
     aanvang: Optional[datetime] = None
     einde: Optional[datetime] = None
-    hoofdvergadering_id: Optional[int] = Field(default=None, foreign_key="vergaderingen.id")
+    hoofdvergadering_id: Optional[int] = Field(default=None, foreign_key="vergaderingen.id", index=True)
     
     # Gremium fields
     gremium_identificatie: Optional[str] = None
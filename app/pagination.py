@@ -0,0 +1,36 @@
+import base64
+from urllib.parse import urlencode
+from fastapi import HTTPException, status
+from app.database import API_SERVER
+
+# Page size limits for list endpoints
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the internal id of the last row on a page as an opaque cursor"""
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor back to the internal id to continue after"""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        id = int(base64.urlsafe_b64decode(padded).decode())
+    except (ValueError, UnicodeDecodeError):
+        id = -1
+    
+    # Ids are 64-bit integers in the database; a larger value cannot be bound as a parameter
+    if not 0 <= id < 2**63:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="De opgegeven cursor is ongeldig.",
+        )
+    return id
+
+
+def next_page_url(path: str, **params) -> str:
+    """Build the URL of the next page, leaving out unset query parameters"""
+    query = urlencode({key: value for key, value in params.items() if value is not None})
+    return f"{API_SERVER}/{path}?{query}"
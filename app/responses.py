@@ -0,0 +1,126 @@
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Iterable, Optional, Union
+from urllib.parse import parse_qs
+
+import orjson
+from fastapi.responses import ORJSONResponse as _ORJSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from app.database import API_SERVER
+
+
+# URL prefixes of the pids are constant, so concatenate instead of formatting an f-string per row
+AGENDAPUNT_PREFIX = f"{API_SERVER}/agendapunten/"
+INFORMATIEOBJECT_PREFIX = f"{API_SERVER}/informatieobjecten/"
+VERGADERING_PREFIX = f"{API_SERVER}/vergaderingen/"
+
+# Serialization options shared by every JSON response; compact, see PrettyJSONMiddleware
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# Number of results serialized per chunk of a streamed list response
+STREAM_BATCH_SIZE = 100
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types orjson cannot serialize natively (Pydantic/SQLModel models)"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """Custom JSON response serialized with orjson"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+def stream_paginated(next_url: Optional[str], results: Iterable[Any]) -> StreamingResponse:
+    """Stream a paginated list, serializing the results in batches instead of as one body.
+
+    The results must not touch the database: the session dependency is closed before
+    the response body is streamed, so pass already loaded rows.
+    """
+    def body():
+        yield b'{"next":' + orjson.dumps(next_url) + b',"previous":null,"results":['
+        iterator = iter(results)
+        separator = b""
+        while batch := list(islice(iterator, STREAM_BATCH_SIZE)):
+            yield separator + b",".join(
+                orjson.dumps(result, default=_default, option=ORJSON_OPTIONS) for result in batch
+            )
+            separator = b","
+        yield b"]}"
+    
+    return StreamingResponse(body(), media_type="application/json")
+
+
+class PrettyJSONMiddleware:
+    """Indent JSON responses when the request asks for it with ?pretty=1.
+
+    Other requests pass straight through, so compact JSON costs nothing extra.
+    """
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_pretty(scope["query_string"]):
+            await self.app(scope, receive, send)
+            return
+        
+        start = None
+        body = []
+        
+        async def send_pretty(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            
+            body.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            
+            content = b"".join(body)
+            headers = [(key, value) for key, value in start["headers"] if key != b"content-length"]
+            if dict(headers).get(b"content-type", b"").startswith(b"application/json") and content:
+                content = orjson.dumps(orjson.loads(content), option=orjson.OPT_INDENT_2)
+            headers.append((b"content-length", str(len(content)).encode()))
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": content})
+        
+        await self.app(scope, receive, send_pretty)
+
+
+# Query values read as true, as for a bool query parameter; anything else is false
+_TRUE_VALUES = frozenset({"1", "true", "t", "yes", "y", "on"})
+
+
+def _wants_pretty(query_string: bytes) -> bool:
+    if b"pretty" not in query_string:
+        return False
+    values = parse_qs(query_string.decode("latin-1")).get("pretty", [])
+    return bool(values) and values[-1].lower() in _TRUE_VALUES
+
+
+# The cached fragments below hold pre-serialized JSON that orjson pastes into the output
+# verbatim. They are keyed on their full content, so a write can never make one stale.
+@lru_cache(maxsize=1024)
+def organisatie_fragment(org_type: str, code: str, naam: str) -> orjson.Fragment:
+    """Organisatie in the shape of the Organisatie schema, serialized once per distinct organisatie"""
+    # The organisatie type (gemeente, provincie, waterschap) is also the key of its code
+    return orjson.Fragment(orjson.dumps({org_type: code, "naam": naam}))
+
+
+@lru_cache(maxsize=4096)
+def verwijzing_fragment(id: Union[int, str]) -> orjson.Fragment:
+    """Reference in the shape of the VerwijzingNaarResource schema, serialized once per id.
+
+    Integer ids are accepted as-is, so a cache hit skips formatting them as a string.
+    """
+    return orjson.Fragment(orjson.dumps({"id": str(id)}))
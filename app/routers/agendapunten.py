@@ -1,123 +1,184 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from collections import defaultdict
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlmodel import Session, select
 from sqlalchemy.orm import selectinload
-from app.database import get_session, API_SERVER
-from app.models import AgendapuntDB, VergaderingDB, InformatieObjectDB
+from app.database import get_session, get_read_session
+from app.lookups import get_or_404, updated_pid_uuid
+from app.models import AgendapuntDB, VergaderingDB, InformatieObjectDB, AgendapuntInformatieObjectLink
+from app.pagination import DEFAULT_LIMIT, MAX_LIMIT, encode_cursor, decode_cursor, next_page_url
+from app.responses import (
+    AGENDAPUNT_PREFIX,
+    INFORMATIEOBJECT_PREFIX,
+    ORJSONResponse,
+    organisatie_fragment,
+    verwijzing_fragment,
+    stream_paginated,
+)
 from app.schemas import (
     Agendapunt,
     AgendapuntZonderPid,
     PaginatedAgendapuntList,
     ErrorResponse,
-    Gemeente,
-    Provincie,
-    Waterschap,
-    VerwijzingNaarResource,
+    organisatie_type_en_code,
+    stored_datetime,
 )
 import uuid
 
 router = APIRouter(prefix="/agendapunten", tags=["Agendapunten"])
 
 
-def db_to_schema(db_agendapunt: AgendapuntDB) -> Agendapunt:
-    """Convert database model to schema"""
-    # Construct organisatie based on type
-    if db_agendapunt.organisatie_type == "gemeente":
-        organisatie = Gemeente(
-            gemeente=db_agendapunt.organisatie_code,
-            naam=db_agendapunt.organisatie_naam,
-        )
-    elif db_agendapunt.organisatie_type == "provincie":
-        organisatie = Provincie(
-            provincie=db_agendapunt.organisatie_code,
-            naam=db_agendapunt.organisatie_naam,
-        )
-    else:
-        organisatie = Waterschap(
-            waterschap=db_agendapunt.organisatie_code,
-            naam=db_agendapunt.organisatie_naam,
-        )
+# Columns rendered by the list endpoint, selected as plain rows instead of ORM instances
+_LIST_COLUMNS = (
+    AgendapuntDB.id,
+    AgendapuntDB.pid_uuid,
+    AgendapuntDB.webpaginalink,
+    AgendapuntDB.organisatie_type,
+    AgendapuntDB.organisatie_code,
+    AgendapuntDB.organisatie_naam,
+    AgendapuntDB.dossiertype,
+    AgendapuntDB.agendapuntnaam,
+    AgendapuntDB.vergadering_id,
+    AgendapuntDB.hoofdagendapunt_id,
+    AgendapuntDB.omschrijving,
+    AgendapuntDB.volgnummer,
+    AgendapuntDB.tussenkop,
+    AgendapuntDB.overig,
+    AgendapuntDB.starttijd,
+    AgendapuntDB.eindtijd,
+    AgendapuntDB.locatie,
+    AgendapuntDB.geplandvolgnummer,
+    AgendapuntDB.geplandeeindtijd,
+    AgendapuntDB.geplandestarttijd,
+    AgendapuntDB.indicatiehamerstuk,
+    AgendapuntDB.indicatiebehandeld,
+    AgendapuntDB.indicatiebesloten,
+)
+
+
+def _informatieobject_uuids(session: Session, agendapunt_ids: List[int]) -> Dict[int, List[str]]:
+    """Get the informatieobject pid_uuids per agendapunt id in a single query"""
+    uuids_per_agendapunt = defaultdict(list)
+    if not agendapunt_ids:
+        return uuids_per_agendapunt
     
-    # Construct vergadering reference
-    vergadering_ref = VerwijzingNaarResource(
-        id=str(db_agendapunt.vergadering_id) if db_agendapunt.vergadering_id else "",
-    )
+    statement = select(
+        AgendapuntInformatieObjectLink.agendapunt_id, InformatieObjectDB.pid_uuid
+    ).join(
+        InformatieObjectDB, InformatieObjectDB.id == AgendapuntInformatieObjectLink.informatieobject_id
+    ).where(AgendapuntInformatieObjectLink.agendapunt_id.in_(agendapunt_ids)).order_by(InformatieObjectDB.id)
+    
+    for agendapunt_id, pid_uuid in session.exec(statement):
+        uuids_per_agendapunt[agendapunt_id].append(pid_uuid)
+    return uuids_per_agendapunt
+
+
+def _db_to_dict(db_agendapunt: AgendapuntDB, informatieobject_uuids: Optional[List[str]] = None) -> dict:
+    """Convert database model (or a row of _LIST_COLUMNS) to a JSON-ready dict in the shape of the Agendapunt schema.
+
+    The database already enforces the constraints, so no Pydantic models are built here.
+    Without informatieobject_uuids they are read from the informatieobjecten relationship.
+    """
+    if informatieobject_uuids is None:
+        informatieobject_uuids = [
+            informatieobject.pid_uuid for informatieobject in db_agendapunt.informatieobjecten
+        ]
     
     # Construct hoofdagendapunt reference if exists
     hoofdagendapunt_ref = None
     if db_agendapunt.hoofdagendapunt_id:
-        hoofdagendapunt_ref = VerwijzingNaarResource(
-            id=str(db_agendapunt.hoofdagendapunt_id),
-        )
+        hoofdagendapunt_ref = verwijzing_fragment(db_agendapunt.hoofdagendapunt_id)
     
-    # Build informatieobjecten URI references
-    informatieobjecten_uris = [
-        f"{API_SERVER}/informatieobjecten/{informatieobject.pid_uuid}"
-        for informatieobject in db_agendapunt.informatieobjecten
-    ] if db_agendapunt.informatieobjecten else []
-    
-    return Agendapunt(
-        pid=f"{API_SERVER}/agendapunten/{db_agendapunt.pid_uuid}",
-        pid_uuid=db_agendapunt.pid_uuid,
-        webpaginalink=db_agendapunt.webpaginalink,
-        organisatie=organisatie,
-        dossiertype=db_agendapunt.dossiertype,
-        agendapuntnaam=db_agendapunt.agendapuntnaam,
-        vergadering=vergadering_ref,
-        hoofdagendapunt=hoofdagendapunt_ref,
-        omschrijving=db_agendapunt.omschrijving,
-        volgnummer=db_agendapunt.volgnummer,
-        tussenkop=db_agendapunt.tussenkop,
-        overig=db_agendapunt.overig,
-        starttijd=db_agendapunt.starttijd,
-        eindtijd=db_agendapunt.eindtijd,
-        locatie=db_agendapunt.locatie,
-        geplandvolgnummer=db_agendapunt.geplandvolgnummer,
-        geplandeeindtijd=db_agendapunt.geplandeeindtijd,
-        geplandestarttijd=db_agendapunt.geplandestarttijd,
-        indicatiehamerstuk=db_agendapunt.indicatiehamerstuk,
-        indicatiebehandeld=db_agendapunt.indicatiebehandeld,
-        indicatiebesloten=db_agendapunt.indicatiebesloten,
-        informatieobjecten=informatieobjecten_uris,
-    )
+    return {
+        "pid": AGENDAPUNT_PREFIX + db_agendapunt.pid_uuid,
+        "pid_uuid": db_agendapunt.pid_uuid,
+        "webpaginalink": db_agendapunt.webpaginalink,
+        "organisatie": organisatie_fragment(
+            db_agendapunt.organisatie_type,
+            db_agendapunt.organisatie_code,
+            db_agendapunt.organisatie_naam,
+        ),
+        "dossiertype": db_agendapunt.dossiertype,
+        "agendapuntnaam": db_agendapunt.agendapuntnaam,
+        "vergadering": verwijzing_fragment(db_agendapunt.vergadering_id or ""),
+        "hoofdagendapunt": hoofdagendapunt_ref,
+        "omschrijving": db_agendapunt.omschrijving,
+        "volgnummer": db_agendapunt.volgnummer,
+        "subagendapunten": None,
+        "tussenkop": db_agendapunt.tussenkop,
+        "overig": db_agendapunt.overig,
+        "starttijd": db_agendapunt.starttijd,
+        "eindtijd": db_agendapunt.eindtijd,
+        "locatie": db_agendapunt.locatie,
+        "geplandvolgnummer": db_agendapunt.geplandvolgnummer,
+        "geplandeeindtijd": db_agendapunt.geplandeeindtijd,
+        "geplandestarttijd": db_agendapunt.geplandestarttijd,
+        "indicatiehamerstuk": db_agendapunt.indicatiehamerstuk,
+        "indicatiebehandeld": db_agendapunt.indicatiebehandeld,
+        "indicatiebesloten": db_agendapunt.indicatiebesloten,
+        "informatieobjecten": [
+            INFORMATIEOBJECT_PREFIX + pid_uuid for pid_uuid in informatieobject_uuids
+        ],
+    }
 
 
-@router.get("", response_model=PaginatedAgendapuntList)
+# Endpoints return their response directly, skipping response model validation
+# and jsonable_encoder; the response models are only declared for the OpenAPI docs.
+@router.get("", response_class=ORJSONResponse, responses={200: {"model": PaginatedAgendapuntList}})
 def get_agendapunten(
     vergadering_pid: Optional[str] = None,
-    session: Session = Depends(get_session)
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    session: Session = Depends(get_read_session)
 ):
     """Alle agendapunten opvragen"""
-    statement = select(AgendapuntDB).options(
-        selectinload(AgendapuntDB.informatieobjecten)
-    )
+    # Keyset pagination on the primary key; one extra row tells whether a next page exists
+    statement = select(*_LIST_COLUMNS).order_by(AgendapuntDB.id).limit(limit + 1)
+    
+    if cursor:
+        statement = statement.where(AgendapuntDB.id > decode_cursor(cursor))
     
-    # Filter by vergadering_pid if provided
+    # Filter by vergadering_pid if provided, joining on the internal id in the same query
     if vergadering_pid:
-        # First get the internal id from the pid
+        statement = statement.join(
+            VergaderingDB, VergaderingDB.id == AgendapuntDB.vergadering_id
+        ).where(VergaderingDB.pid == vergadering_pid)
+    
+    agendapunten = session.exec(statement).all()
+    
+    # An empty result only needs a second query to tell an unknown vergadering apart
+    if vergadering_pid and not agendapunten:
         vergadering_statement = select(VergaderingDB.id).where(VergaderingDB.pid == vergadering_pid)
-        internal_id = session.exec(vergadering_statement).first()
-        
-        if not internal_id:
+        if session.exec(vergadering_statement).first() is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="De gevraagde vergadering is niet gevonden.",
             )
-        
-        statement = statement.where(AgendapuntDB.vergadering_id == internal_id)
     
-    agendapunten = session.exec(statement).all()
+    next_url = None
+    if len(agendapunten) > limit:
+        agendapunten = agendapunten[:limit]
+        next_url = next_page_url(
+            "agendapunten",
+            vergadering_pid=vergadering_pid,
+            cursor=encode_cursor(agendapunten[-1].id),
+            limit=limit,
+        )
     
-    results = [db_to_schema(ap) for ap in agendapunten]
+    uuids_per_agendapunt = _informatieobject_uuids(session, [ap.id for ap in agendapunten])
     
-    return PaginatedAgendapuntList(
-        next=None,
-        previous=None,
-        results=results,
+    return stream_paginated(
+        next_url,
+        (_db_to_dict(ap, uuids_per_agendapunt[ap.id]) for ap in agendapunten),
     )
 
 
-@router.post("", response_model=Agendapunt, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={201: {"model": Agendapunt}},
+)
 def post_agendapunt(
     agendapunt: AgendapuntZonderPid,
     session: Session = Depends(get_session),
@@ -125,20 +186,12 @@ def post_agendapunt(
     """Het vastleggen van een agendapunt"""
     # Extract organisatie data
     organisatie = agendapunt.organisatie
-    if isinstance(organisatie, Gemeente):
-        org_type = "gemeente"
-        org_code = organisatie.gemeente
-    elif isinstance(organisatie, Provincie):
-        org_type = "provincie"
-        org_code = organisatie.provincie
-    else:
-        org_type = "waterschap"
-        org_code = organisatie.waterschap
+    org_type, org_code = organisatie_type_en_code(organisatie)
     
     # Create database object
     # Generate pid as URL with UUID
     generated_uuid = str(uuid.uuid4())
-    pid = f"{API_SERVER}/agendapunten/{generated_uuid}"
+    pid = AGENDAPUNT_PREFIX + generated_uuid
     
     # Try to convert ids to int, otherwise skip (external references)
     vergadering_id = None
@@ -159,6 +212,7 @@ def post_agendapunt(
         except (ValueError, TypeError):
             pass
     
+    # The response is built from this object, so its datetimes must already be in their stored form
     db_agendapunt = AgendapuntDB(
         pid=pid,
         pid_uuid=generated_uuid,
@@ -174,80 +228,60 @@ def post_agendapunt(
         volgnummer=agendapunt.volgnummer,
         tussenkop=agendapunt.tussenkop,
         overig=agendapunt.overig,
-        starttijd=agendapunt.starttijd,
-        eindtijd=agendapunt.eindtijd,
+        starttijd=stored_datetime(agendapunt.starttijd),
+        eindtijd=stored_datetime(agendapunt.eindtijd),
         locatie=agendapunt.locatie,
         geplandvolgnummer=agendapunt.geplandvolgnummer,
-        geplandeeindtijd=agendapunt.geplandeeindtijd,
-        geplandestarttijd=agendapunt.geplandestarttijd,
+        geplandeeindtijd=stored_datetime(agendapunt.geplandeeindtijd),
+        geplandestarttijd=stored_datetime(agendapunt.geplandestarttijd),
         indicatiehamerstuk=agendapunt.indicatiehamerstuk,
         indicatiebehandeld=agendapunt.indicatiebehandeld,
         indicatiebesloten=agendapunt.indicatiebesloten,
+        informatieobjecten=[],
     )
     
+    # Flush to run the INSERT, then serialize from the in-memory object before the commit
+    # expires it; this avoids reloading the row that was just written
     session.add(db_agendapunt)
+    session.flush()
+    result = _db_to_dict(db_agendapunt)
     session.commit()
-    session.refresh(db_agendapunt)
-    
-    # Reload with relationships
-    statement = select(AgendapuntDB).where(AgendapuntDB.id == db_agendapunt.id).options(
-        selectinload(AgendapuntDB.informatieobjecten)
-    )
-    db_agendapunt = session.exec(statement).first()
     
-    return db_to_schema(db_agendapunt)
+    return ORJSONResponse(result, status_code=status.HTTP_201_CREATED)
 
 
-@router.get("/{id}", response_model=Agendapunt)
-def get_agendapunt(id: str, session: Session = Depends(get_session)):
+@router.get("/{id}", response_class=ORJSONResponse, responses={200: {"model": Agendapunt}})
+def get_agendapunt(id: uuid.UUID, session: Session = Depends(get_read_session)):
     """Een specifiek agendapunt opvragen"""
-    statement = select(AgendapuntDB).where(AgendapuntDB.pid_uuid == id).options(
-        selectinload(AgendapuntDB.informatieobjecten)
-    )
-    agendapunt = session.exec(statement).first()
-    
-    if not agendapunt:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="De gevraagde resource is niet gevonden.",
-        )
+    agendapunt = get_or_404(session, AgendapuntDB, id, selectinload(AgendapuntDB.informatieobjecten))
     
-    return db_to_schema(agendapunt)
+    return ORJSONResponse(_db_to_dict(agendapunt))
 
 
-@router.put("/{id}", response_model=Agendapunt, status_code=status.HTTP_201_CREATED)
+@router.put(
+    "/{id}",
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={201: {"model": Agendapunt}},
+)
 def put_agendapunt(
-    id: str,
+    id: uuid.UUID,
     agendapunt: Agendapunt,
     session: Session = Depends(get_session),
 ):
     """Het wijzigen van een agendapunt"""
-    statement = select(AgendapuntDB).where(AgendapuntDB.pid_uuid == id)
-    db_agendapunt = session.exec(statement).first()
+    db_agendapunt = get_or_404(session, AgendapuntDB, id, selectinload(AgendapuntDB.informatieobjecten))
     
-    if not db_agendapunt:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="De gevraagde resource is niet gevonden.",
-        )
+    pid_uuid = updated_pid_uuid(session, AgendapuntDB, db_agendapunt.pid_uuid, agendapunt.pid_uuid)
     
     # Update fields
     organisatie = agendapunt.organisatie
-    if isinstance(organisatie, Gemeente):
-        db_agendapunt.organisatie_type = "gemeente"
-        db_agendapunt.organisatie_code = organisatie.gemeente
-    elif isinstance(organisatie, Provincie):
-        db_agendapunt.organisatie_type = "provincie"
-        db_agendapunt.organisatie_code = organisatie.provincie
-    else:
-        db_agendapunt.organisatie_type = "waterschap"
-        db_agendapunt.organisatie_code = organisatie.waterschap
-    
+    db_agendapunt.organisatie_type, db_agendapunt.organisatie_code = organisatie_type_en_code(organisatie)
     db_agendapunt.organisatie_naam = organisatie.naam
     db_agendapunt.webpaginalink = agendapunt.webpaginalink
     db_agendapunt.dossiertype = agendapunt.dossiertype
     db_agendapunt.agendapuntnaam = agendapunt.agendapuntnaam
-    db_agendapunt.pid_uuid = agendapunt.pid_uuid
+    db_agendapunt.pid_uuid = pid_uuid
     
     # Try to convert ids to int
     if agendapunt.vergadering and agendapunt.vergadering.id:
@@ -269,34 +303,29 @@ def put_agendapunt(
     db_agendapunt.volgnummer = agendapunt.volgnummer
     db_agendapunt.tussenkop = agendapunt.tussenkop
     db_agendapunt.overig = agendapunt.overig
-    db_agendapunt.starttijd = agendapunt.starttijd
-    db_agendapunt.eindtijd = agendapunt.eindtijd
+    db_agendapunt.starttijd = stored_datetime(agendapunt.starttijd)
+    db_agendapunt.eindtijd = stored_datetime(agendapunt.eindtijd)
     db_agendapunt.locatie = agendapunt.locatie
     db_agendapunt.geplandvolgnummer = agendapunt.geplandvolgnummer
-    db_agendapunt.geplandeeindtijd = agendapunt.geplandeeindtijd
-    db_agendapunt.geplandestarttijd = agendapunt.geplandestarttijd
+    db_agendapunt.geplandeeindtijd = stored_datetime(agendapunt.geplandeeindtijd)
+    db_agendapunt.geplandestarttijd = stored_datetime(agendapunt.geplandestarttijd)
     db_agendapunt.indicatiehamerstuk = agendapunt.indicatiehamerstuk
     db_agendapunt.indicatiebehandeld = agendapunt.indicatiebehandeld
     db_agendapunt.indicatiebesloten = agendapunt.indicatiebesloten
     
+    # The informatieobjecten were loaded with the lookup, so serialize before the commit expires them
     session.add(db_agendapunt)
+    session.flush()
+    result = _db_to_dict(db_agendapunt)
     session.commit()
-    session.refresh(db_agendapunt)
     
-    return db_to_schema(db_agendapunt)
+    return ORJSONResponse(result, status_code=status.HTTP_201_CREATED)
 
 
 @router.delete("/{id}", status_code=status.HTTP_200_OK)
-def del_agendapunt(id: str, session: Session = Depends(get_session)):
+def del_agendapunt(id: uuid.UUID, session: Session = Depends(get_session)):
     """Het bericht voor het verwijderen van een agendapunt"""
-    statement = select(AgendapuntDB).where(AgendapuntDB.pid_uuid == id)
-    agendapunt = session.exec(statement).first()
-    
-    if not agendapunt:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="De gevraagde resource is niet gevonden.",
-        )
+    agendapunt = get_or_404(session, AgendapuntDB, id)
     
     session.delete(agendapunt)
     session.commit()
@@ -1,102 +1,121 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, Query, status, Header
 from sqlmodel import Session, select
 from sqlalchemy.orm import selectinload
-from app.database import get_session, API_SERVER
+from app.database import get_session, get_read_session
+from app.lookups import get_or_404, updated_pid_uuid
 from app.models import InformatieObjectDB, AgendapuntDB, VergaderingDB
+from app.pagination import DEFAULT_LIMIT, MAX_LIMIT, decode_cursor, encode_cursor, next_page_url
+from app.responses import (
+    AGENDAPUNT_PREFIX,
+    INFORMATIEOBJECT_PREFIX,
+    VERGADERING_PREFIX,
+    ORJSONResponse,
+    organisatie_fragment,
+    stream_paginated,
+)
 from app.schemas import (
     InformatieObject,
     InformatieObjectZonderPid,
     PaginatedInformatieObjectList,
     ErrorResponse,
-    Gemeente,
-    Provincie,
-    Waterschap,
-    VerwijzingNaarResource,
+    organisatie_type_en_code,
 )
 import uuid
 
 router = APIRouter(prefix="/informatieobjecten", tags=["Informatieobjecten"])
 
 
-def db_to_schema(db_obj: InformatieObjectDB) -> InformatieObject:
-    """Convert database model to schema"""
-    # Construct organisatie based on type
-    if db_obj.organisatie_type == "gemeente":
-        organisatie = Gemeente(
-            gemeente=db_obj.organisatie_code,
-            naam=db_obj.organisatie_naam,
-        )
-    elif db_obj.organisatie_type == "provincie":
-        organisatie = Provincie(
-            provincie=db_obj.organisatie_code,
-            naam=db_obj.organisatie_naam,
-        )
-    else:
-        organisatie = Waterschap(
-            waterschap=db_obj.organisatie_code,
-            naam=db_obj.organisatie_naam,
-        )
-    
+def _verwijzing_uuids(refs) -> List[str]:
+    """Canonical pid_uuids of references given as a URL or as a bare uuid, in any case or format"""
+    uuids = []
+    for ref in refs:
+        # A reference that is no uuid cannot match a resource, so it is ignored like any unknown one
+        try:
+            uuids.append(str(uuid.UUID(ref.id.split("/")[-1])))
+        except ValueError:
+            pass
+    return uuids
+
+
+def _db_to_dict(db_obj: InformatieObjectDB) -> dict:
+    """Convert database model to a JSON-ready dict in the shape of the InformatieObject schema"""
     # Build agendapunten URI references
     agendapunten_refs = [
-        VerwijzingNaarResource(id=f"{API_SERVER}/agendapunten/{agendapunt.pid_uuid}")
+        {"id": AGENDAPUNT_PREFIX + agendapunt.pid_uuid}
         for agendapunt in db_obj.agendapunten
-    ] if db_obj.agendapunten else None
+    ] or None
     
     # Collect unique vergaderingen via agendapunten
-    vergadering_uuids = set()
-    if db_obj.agendapunten:
-        for agendapunt in db_obj.agendapunten:
-            if agendapunt.vergadering_id:
-                # Access the vergadering relationship
-                if agendapunt.vergadering:
-                    vergadering_uuids.add(agendapunt.vergadering.pid_uuid)
+    vergadering_uuids = {
+        agendapunt.vergadering.pid_uuid
+        for agendapunt in db_obj.agendapunten
+        if agendapunt.vergadering_id and agendapunt.vergadering
+    }
     
     vergaderingen_refs = [
-        VerwijzingNaarResource(id=f"{API_SERVER}/vergaderingen/{verg_uuid}")
+        {"id": VERGADERING_PREFIX + verg_uuid}
         for verg_uuid in sorted(vergadering_uuids)
-    ] if vergadering_uuids else None
+    ] or None
     
-    return InformatieObject(
-        pid=f"{API_SERVER}/informatieobjecten/{db_obj.pid_uuid}",
-        pid_uuid=db_obj.pid_uuid,
-        webpaginalink=db_obj.webpaginalink,
-        organisatie=organisatie,
-        titel=db_obj.titel,
-        wooinformatiecategorie=db_obj.wooinformatiecategorie,
-        datumingediend=db_obj.datumingediend,
-        id=db_obj.external_id,
-        auteur=db_obj.auteur,
-        bronorganisatie=db_obj.bronorganisatie,
-        creatiedatum=db_obj.creatiedatum,
-        informatieobjecttype=db_obj.informatieobjecttype,
-        formaat=db_obj.formaat,
-        omschrijving=db_obj.omschrijving,
-        taal=db_obj.taal,
-        vergaderingen=vergaderingen_refs,
-        agendapunten=agendapunten_refs,
-    )
+    return {
+        "pid": INFORMATIEOBJECT_PREFIX + db_obj.pid_uuid,
+        "pid_uuid": db_obj.pid_uuid,
+        "webpaginalink": db_obj.webpaginalink,
+        "organisatie": organisatie_fragment(
+            db_obj.organisatie_type,
+            db_obj.organisatie_code,
+            db_obj.organisatie_naam,
+        ),
+        "titel": db_obj.titel,
+        "wooinformatiecategorie": db_obj.wooinformatiecategorie,
+        "datumingediend": db_obj.datumingediend,
+        "id": db_obj.external_id,
+        "auteur": db_obj.auteur,
+        "bronorganisatie": db_obj.bronorganisatie,
+        "creatiedatum": db_obj.creatiedatum,
+        "informatieobjecttype": db_obj.informatieobjecttype,
+        "formaat": db_obj.formaat,
+        "omschrijving": db_obj.omschrijving,
+        "taal": db_obj.taal,
+        "vergaderingen": vergaderingen_refs,
+        "agendapunten": agendapunten_refs,
+        "gerelateerdinformatieobject": None,
+    }
 
 
-@router.get("", response_model=PaginatedInformatieObjectList)
-def get_informatieobjecten(session: Session = Depends(get_session)):
+@router.get("", response_class=ORJSONResponse, responses={200: {"model": PaginatedInformatieObjectList}})
+def get_informatieobjecten(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    session: Session = Depends(get_read_session),
+):
     """Alle informatieobjecten opvragen"""
-    statement = select(InformatieObjectDB).options(
+    # Keyset pagination on the primary key; one extra row tells whether a next page exists
+    statement = select(InformatieObjectDB).order_by(InformatieObjectDB.id).limit(limit + 1).options(
         selectinload(InformatieObjectDB.agendapunten).selectinload(AgendapuntDB.vergadering)
     )
+    
+    if cursor:
+        statement = statement.where(InformatieObjectDB.id > decode_cursor(cursor))
+    
     informatieobjecten = session.exec(statement).all()
     
-    results = [db_to_schema(obj) for obj in informatieobjecten]
+    next_url = None
+    if len(informatieobjecten) > limit:
+        informatieobjecten = informatieobjecten[:limit]
+        next_url = next_page_url("informatieobjecten", cursor=encode_cursor(informatieobjecten[-1].id), limit=limit)
     
-    return PaginatedInformatieObjectList(
-        next=None,
-        previous=None,
-        results=results,
-    )
+    # Build the dicts now: the session is closed before the response is streamed
+    return stream_paginated(next_url, [_db_to_dict(obj) for obj in informatieobjecten])
 
 
-@router.post("", response_model=InformatieObject, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={201: {"model": InformatieObject}},
+)
 def post_informatieobject(
     informatieobject: InformatieObjectZonderPid,
     session: Session = Depends(get_session),
@@ -104,20 +123,13 @@ def post_informatieobject(
     """Het vastleggen van een informatieobject"""
     # Extract organisatie data
     organisatie = informatieobject.organisatie
-    if isinstance(organisatie, Gemeente):
-        org_type = "gemeente"
-        org_code = organisatie.gemeente
-    elif isinstance(organisatie, Provincie):
-        org_type = "provincie"
-        org_code = organisatie.provincie
-    else:
-        org_type = "waterschap"
-        org_code = organisatie.waterschap
+    org_type, org_code = organisatie_type_en_code(organisatie)
+    gerelateerd = informatieobject.gerelateerdinformatieobject
     
     # Create database object
     # Generate pid as UUID
     generated_uuid = str(uuid.uuid4())
-    pid = f"{API_SERVER}/informatieobjecten/{generated_uuid}"
+    pid = INFORMATIEOBJECT_PREFIX + generated_uuid
     
     db_obj = InformatieObjectDB(
         pid=pid,
@@ -137,31 +149,26 @@ def post_informatieobject(
         formaat=informatieobject.formaat,
         omschrijving=informatieobject.omschrijving,
         taal=informatieobject.taal,
-        gerelateerd_informatieobject_id=informatieobject.gerelateerdinformatieobject.informatieobject if informatieobject.gerelateerdinformatieobject else None,
-        gerelateerd_rol=informatieobject.gerelateerdinformatieobject.rol if informatieobject.gerelateerdinformatieobject else None,
+        gerelateerd_informatieobject_id=gerelateerd.informatieobject if gerelateerd else None,
+        gerelateerd_rol=gerelateerd.rol if gerelateerd else None,
     )
     
-    session.add(db_obj)
-    session.commit()
-    session.refresh(db_obj)
-    
     # Track all linked agendapunten
     linked_agendapunten = []
     
     # Link vergaderingen if provided - link to all agendapunten of those vergaderingen
     if informatieobject.vergaderingen:
-        for vergadering_ref in informatieobject.vergaderingen:
-            # Extract UUID from id (could be URL or UUID)
-            vergadering_uuid = vergadering_ref.id
-            if "/" in vergadering_uuid:
-                vergadering_uuid = vergadering_uuid.split("/")[-1]
-            
-            # Find vergadering and its agendapunten
-            vergadering_statement = select(VergaderingDB).where(VergaderingDB.pid_uuid == vergadering_uuid).options(
-                selectinload(VergaderingDB.agendapunten)
-            )
-            vergadering = session.exec(vergadering_statement).first()
-            
+        # The same canonical form is used for the query and for the lookup in its result
+        vergadering_uuids = _verwijzing_uuids(informatieobject.vergaderingen)
+        
+        # Find all vergaderingen and their agendapunten in one query
+        vergadering_statement = select(VergaderingDB).where(VergaderingDB.pid_uuid.in_(vergadering_uuids)).options(
+            selectinload(VergaderingDB.agendapunten)
+        )
+        vergaderingen = {v.pid_uuid: v for v in session.exec(vergadering_statement)}
+        
+        for vergadering_uuid in vergadering_uuids:
+            vergadering = vergaderingen.get(vergadering_uuid)
             if vergadering and vergadering.agendapunten:
                 for agendapunt in vergadering.agendapunten:
                     if agendapunt not in linked_agendapunten:
@@ -169,89 +176,69 @@ def post_informatieobject(
     
     # Link agendapunten if provided
     if informatieobject.agendapunten:
-        for agendapunt_ref in informatieobject.agendapunten:
-            # Extract UUID from id (could be URL or UUID)
-            agendapunt_uuid = agendapunt_ref.id
-            if "/" in agendapunt_uuid:
-                agendapunt_uuid = agendapunt_uuid.split("/")[-1]
-            
-            # Find agendapunt by pid_uuid with eager loading
-            agendapunt_statement = select(AgendapuntDB).where(AgendapuntDB.pid_uuid == agendapunt_uuid).options(
-                selectinload(AgendapuntDB.vergadering)
-            )
-            agendapunt = session.exec(agendapunt_statement).first()
-            
+        # The same canonical form is used for the query and for the lookup in its result
+        agendapunt_uuids = _verwijzing_uuids(informatieobject.agendapunten)
+        
+        # Find all agendapunten by pid_uuid in one query
+        agendapunt_statement = select(AgendapuntDB).where(AgendapuntDB.pid_uuid.in_(agendapunt_uuids)).options(
+            selectinload(AgendapuntDB.vergadering)
+        )
+        agendapunten = {a.pid_uuid: a for a in session.exec(agendapunt_statement)}
+        
+        for agendapunt_uuid in agendapunt_uuids:
+            agendapunt = agendapunten.get(agendapunt_uuid)
             if agendapunt and agendapunt not in linked_agendapunten:
                 linked_agendapunten.append(agendapunt)
     
-    # Add all linked agendapunten to the informatieobject
-    if linked_agendapunten:
-        for agendapunt in linked_agendapunten:
-            db_obj.agendapunten.append(agendapunt)
-        
-        session.add(db_obj)
-        session.commit()
-        session.refresh(db_obj)
-        
-        # Reload with relationships
-        statement = select(InformatieObjectDB).where(InformatieObjectDB.id == db_obj.id).options(
-            selectinload(InformatieObjectDB.agendapunten).selectinload(AgendapuntDB.vergadering)
-        )
-        db_obj = session.exec(statement).first()
+    # Store the informatieobject together with its links in one commit, in the order they are read back
+    db_obj.agendapunten = sorted(linked_agendapunten, key=lambda agendapunt: agendapunt.id)
+    
+    # Flush to run the INSERTs, then serialize from the in-memory objects before the commit
+    # expires them; this avoids reloading the rows that were just written
+    session.add(db_obj)
+    session.flush()
+    result = _db_to_dict(db_obj)
+    session.commit()
     
-    return db_to_schema(db_obj)
+    return ORJSONResponse(result, status_code=status.HTTP_201_CREATED)
 
 
-@router.get("/{id}", response_model=InformatieObject)
-def get_informatieobject(id: str, session: Session = Depends(get_session)):
+@router.get("/{id}", response_class=ORJSONResponse, responses={200: {"model": InformatieObject}})
+def get_informatieobject(id: uuid.UUID, session: Session = Depends(get_read_session)):
     """Een specifiek informatieobject opvragen"""
-    statement = select(InformatieObjectDB).where(InformatieObjectDB.pid_uuid == id).options(
-        selectinload(InformatieObjectDB.agendapunten).selectinload(AgendapuntDB.vergadering)
+    informatieobject = get_or_404(
+        session, InformatieObjectDB, id, selectinload(InformatieObjectDB.agendapunten).selectinload(AgendapuntDB.vergadering)
     )
-    informatieobject = session.exec(statement).first()
-    
-    if not informatieobject:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="De gevraagde resource is niet gevonden.",
-        )
     
-    return db_to_schema(informatieobject)
+    return ORJSONResponse(_db_to_dict(informatieobject))
 
 
-@router.put("/{id}", response_model=InformatieObject, status_code=status.HTTP_201_CREATED)
+@router.put(
+    "/{id}",
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={201: {"model": InformatieObject}},
+)
 def put_informatieobject(
-    id: str,
+    id: uuid.UUID,
     informatieobject: InformatieObject,
     x_reason: str = Header(..., alias="X-Reason"),
     session: Session = Depends(get_session),
 ):
     """Het wijzigen van een Informatieobject"""
-    statement = select(InformatieObjectDB).where(InformatieObjectDB.pid_uuid == id)
-    db_obj = session.exec(statement).first()
+    db_obj = get_or_404(
+        session, InformatieObjectDB, id, selectinload(InformatieObjectDB.agendapunten).selectinload(AgendapuntDB.vergadering)
+    )
     
-    if not db_obj:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="De gevraagde resource is niet gevonden.",
-        )
+    pid_uuid = updated_pid_uuid(session, InformatieObjectDB, db_obj.pid_uuid, informatieobject.pid_uuid)
     
     # Update fields
     organisatie = informatieobject.organisatie
-    if isinstance(organisatie, Gemeente):
-        db_obj.organisatie_type = "gemeente"
-        db_obj.organisatie_code = organisatie.gemeente
-    elif isinstance(organisatie, Provincie):
-        db_obj.organisatie_type = "provincie"
-        db_obj.organisatie_code = organisatie.provincie
-    else:
-        db_obj.organisatie_type = "waterschap"
-        db_obj.organisatie_code = organisatie.waterschap
-    
+    db_obj.organisatie_type, db_obj.organisatie_code = organisatie_type_en_code(organisatie)
     db_obj.organisatie_naam = organisatie.naam
     db_obj.webpaginalink = informatieobject.webpaginalink
     db_obj.titel = informatieobject.titel
-    db_obj.pid_uuid = informatieobject.pid_uuid
+    db_obj.pid_uuid = pid_uuid
     db_obj.wooinformatiecategorie = informatieobject.wooinformatiecategorie
     db_obj.datumingediend = informatieobject.datumingediend
     db_obj.external_id = informatieobject.id
@@ -262,31 +249,27 @@ def put_informatieobject(
     db_obj.formaat = informatieobject.formaat
     db_obj.omschrijving = informatieobject.omschrijving
     db_obj.taal = informatieobject.taal
-    db_obj.gerelateerd_informatieobject_id = informatieobject.gerelateerdinformatieobject.informatieobject if informatieobject.gerelateerdinformatieobject else None
-    db_obj.gerelateerd_rol = informatieobject.gerelateerdinformatieobject.rol if informatieobject.gerelateerdinformatieobject else None
+    gerelateerd = informatieobject.gerelateerdinformatieobject
+    db_obj.gerelateerd_informatieobject_id = gerelateerd.informatieobject if gerelateerd else None
+    db_obj.gerelateerd_rol = gerelateerd.rol if gerelateerd else None
     
+    # The relationships were loaded with the lookup, so serialize before the commit expires them
     session.add(db_obj)
+    session.flush()
+    result = _db_to_dict(db_obj)
     session.commit()
-    session.refresh(db_obj)
     
-    return db_to_schema(db_obj)
+    return ORJSONResponse(result, status_code=status.HTTP_201_CREATED)
 
 
 @router.delete("/{id}", status_code=status.HTTP_200_OK)
 def del_informatieobject(
-    id: str,
+    id: uuid.UUID,
     x_reason: str = Header(..., alias="X-Reason"),
     session: Session = Depends(get_session),
 ):
     """Het bericht voor het verwijderen van een informatieobject"""
-    statement = select(InformatieObjectDB).where(InformatieObjectDB.pid_uuid == id)
-    informatieobject = session.exec(statement).first()
-    
-    if not informatieobject:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="De gevraagde resource is niet gevonden.",
-        )
+    informatieobject = get_or_404(session, InformatieObjectDB, id)
     
     session.delete(informatieobject)
     session.commit()
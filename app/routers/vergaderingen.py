@@ -1,120 +1,121 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Query, status
 from sqlmodel import Session, select
 from sqlalchemy.orm import selectinload
-from app.database import get_session, API_SERVER
+from app.database import get_session, get_read_session
+from app.lookups import get_or_404, updated_pid_uuid
 from app.models import VergaderingDB, AgendapuntDB, InformatieObjectDB
+from app.pagination import DEFAULT_LIMIT, MAX_LIMIT, decode_cursor, encode_cursor, next_page_url
+from app.responses import (
+    AGENDAPUNT_PREFIX,
+    INFORMATIEOBJECT_PREFIX,
+    VERGADERING_PREFIX,
+    ORJSONResponse,
+    organisatie_fragment,
+    stream_paginated,
+)
 from app.schemas import (
     Vergadering,
     VergaderingZonderPid,
     PaginatedVergaderingList,
     ErrorResponse,
-    Gemeente,
-    Provincie,
-    Waterschap,
-    Gremium,
-    VerwijzingNaarResource,
+    organisatie_type_en_code,
+    stored_datetime,
 )
 import uuid
 
 router = APIRouter(prefix="/vergaderingen", tags=["Vergaderingen"])
 
 
-def db_to_schema(db_vergadering: VergaderingDB) -> Vergadering:
-    """Convert database model to schema"""
-    # Construct organisatie based on type
-    if db_vergadering.organisatie_type == "gemeente":
-        organisatie = Gemeente(
-            gemeente=db_vergadering.organisatie_code,
-            naam=db_vergadering.organisatie_naam,
-        )
-    elif db_vergadering.organisatie_type == "provincie":
-        organisatie = Provincie(
-            provincie=db_vergadering.organisatie_code,
-            naam=db_vergadering.organisatie_naam,
-        )
-    else:
-        organisatie = Waterschap(
-            waterschap=db_vergadering.organisatie_code,
-            naam=db_vergadering.organisatie_naam,
-        )
-    
+def _db_to_dict(db_vergadering: VergaderingDB) -> dict:
+    """Convert database model to a JSON-ready dict in the shape of the Vergadering schema"""
     # Construct gremium if present
     gremium = None
     if db_vergadering.gremium_identificatie and db_vergadering.gremium_naam:
-        gremium = Gremium(
-            gremiumidentificatie=db_vergadering.gremium_identificatie,
-            gremiumnaam=db_vergadering.gremium_naam,
-        )
+        gremium = {
+            "gremiumidentificatie": db_vergadering.gremium_identificatie,
+            "gremiumnaam": db_vergadering.gremium_naam,
+        }
     
     # Construct hoofdvergadering reference if exists
     hoofdvergadering_ref = None
     if db_vergadering.hoofdvergadering_id:
-        hoofdvergadering_ref = VerwijzingNaarResource(
-            id=str(db_vergadering.hoofdvergadering_id),
-        )
-    
-    # Build agendapunten URI references
-    agendapunten_uris = [
-        f"{API_SERVER}/agendapunten/{agendapunt.pid_uuid}"
-        for agendapunt in db_vergadering.agendapunten
-    ] if db_vergadering.agendapunten else []
+        hoofdvergadering_ref = {"id": str(db_vergadering.hoofdvergadering_id)}
     
     # Collect all unique informatieobjecten from all agendapunten
-    informatieobject_uuids = set()
-    if db_vergadering.agendapunten:
-        for agendapunt in db_vergadering.agendapunten:
-            if agendapunt.informatieobjecten:
-                for informatieobject in agendapunt.informatieobjecten:
-                    informatieobject_uuids.add(informatieobject.pid_uuid)
-    
-    informatieobjecten_uris = [
-        f"{API_SERVER}/informatieobjecten/{uuid}"
-        for uuid in sorted(informatieobject_uuids)
-    ]
-    
-    return Vergadering(
-        pid=f"{API_SERVER}/vergaderingen/{db_vergadering.pid_uuid}",
-        pid_uuid=db_vergadering.pid_uuid,
-        webpaginalink=db_vergadering.webpaginalink,
-        organisatie=organisatie,
-        dossiertype=db_vergadering.dossiertype,
-        naam=db_vergadering.naam,
-        aanvang=db_vergadering.aanvang,
-        hoofdvergadering=hoofdvergadering_ref,
-        einde=db_vergadering.einde,
-        georganiseerddoorgremium=gremium,
-        geplandeaanvang=db_vergadering.geplandeaanvang,
-        geplandeeinde=db_vergadering.geplandeeinde,
-        geplandedatum=db_vergadering.geplandedatum,
-        locatie=db_vergadering.locatie,
-        vergaderstatus=db_vergadering.vergaderstatus,
-        vergadertoelichting=db_vergadering.vergadertoelichting,
-        vergaderdatum=db_vergadering.vergaderdatum,
-        vergaderingstype=db_vergadering.vergaderingstype,
-        agendapunten=agendapunten_uris,
-        informatieobjecten=informatieobjecten_uris,
-    )
+    informatieobject_uuids = {
+        informatieobject.pid_uuid
+        for agendapunt in db_vergadering.agendapunten
+        for informatieobject in agendapunt.informatieobjecten
+    }
+    
+    return {
+        "pid": VERGADERING_PREFIX + db_vergadering.pid_uuid,
+        "pid_uuid": db_vergadering.pid_uuid,
+        "webpaginalink": db_vergadering.webpaginalink,
+        "organisatie": organisatie_fragment(
+            db_vergadering.organisatie_type,
+            db_vergadering.organisatie_code,
+            db_vergadering.organisatie_naam,
+        ),
+        "dossiertype": db_vergadering.dossiertype,
+        "naam": db_vergadering.naam,
+        "aanvang": db_vergadering.aanvang,
+        "hoofdvergadering": hoofdvergadering_ref,
+        "einde": db_vergadering.einde,
+        "georganiseerddoorgremium": gremium,
+        "geplandeaanvang": db_vergadering.geplandeaanvang,
+        "geplandeeinde": db_vergadering.geplandeeinde,
+        "geplandedatum": db_vergadering.geplandedatum,
+        "locatie": db_vergadering.locatie,
+        "vergaderstatus": db_vergadering.vergaderstatus,
+        "vergadertoelichting": db_vergadering.vergadertoelichting,
+        "vergaderdatum": db_vergadering.vergaderdatum,
+        "vergaderingstype": db_vergadering.vergaderingstype,
+        "deelvergaderingen": None,
+        "agendapunten": [
+            AGENDAPUNT_PREFIX + agendapunt.pid_uuid
+            for agendapunt in db_vergadering.agendapunten
+        ],
+        "informatieobjecten": [
+            INFORMATIEOBJECT_PREFIX + uuid
+            for uuid in sorted(informatieobject_uuids)
+        ],
+    }
 
 
-@router.get("", response_model=PaginatedVergaderingList)
-def get_vergaderingen(session: Session = Depends(get_session)):
+@router.get("", response_class=ORJSONResponse, responses={200: {"model": PaginatedVergaderingList}})
+def get_vergaderingen(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    session: Session = Depends(get_read_session),
+):
     """Alle vergaderingen opvragen"""
-    statement = select(VergaderingDB).options(
+    # Keyset pagination on the primary key; one extra row tells whether a next page exists
+    statement = select(VergaderingDB).order_by(VergaderingDB.id).limit(limit + 1).options(
         selectinload(VergaderingDB.agendapunten).selectinload(AgendapuntDB.informatieobjecten)
     )
+    
+    if cursor:
+        statement = statement.where(VergaderingDB.id > decode_cursor(cursor))
+    
     vergaderingen = session.exec(statement).all()
     
-    results = [db_to_schema(v) for v in vergaderingen]
+    next_url = None
+    if len(vergaderingen) > limit:
+        vergaderingen = vergaderingen[:limit]
+        next_url = next_page_url("vergaderingen", cursor=encode_cursor(vergaderingen[-1].id), limit=limit)
     
-    return PaginatedVergaderingList(
-        next=None,
-        previous=None,
-        results=results,
-    )
+    # Build the dicts now: the session is closed before the response is streamed
+    return stream_paginated(next_url, [_db_to_dict(v) for v in vergaderingen])
 
 
-@router.post("", response_model=Vergadering, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={201: {"model": Vergadering}},
+)
 def post_vergadering(
     vergadering: VergaderingZonderPid,
     session: Session = Depends(get_session),
@@ -122,20 +123,12 @@ def post_vergadering(
     """Het vastleggen van een vergadering"""
     # Extract organisatie data
     organisatie = vergadering.organisatie
-    if isinstance(organisatie, Gemeente):
-        org_type = "gemeente"
-        org_code = organisatie.gemeente
-    elif isinstance(organisatie, Provincie):
-        org_type = "provincie"
-        org_code = organisatie.provincie
-    else:
-        org_type = "waterschap"
-        org_code = organisatie.waterschap
+    org_type, org_code = organisatie_type_en_code(organisatie)
     
     # Create database object
     # Generate pid as UUID
     generated_uuid = str(uuid.uuid4())
-    pid = f"{API_SERVER}/vergaderingen/{generated_uuid}"
+    pid = VERGADERING_PREFIX + generated_uuid
     
     # Try to convert ids to int, otherwise skip (external references)
     hoofdvergadering_id = None
@@ -145,6 +138,8 @@ def post_vergadering(
         except (ValueError, TypeError):
             pass  # External reference, not a database ID
     
+    gremium = vergadering.georganiseerddoorgremium
+    # The response is built from this object, so its datetimes must already be in their stored form
     db_vergadering = VergaderingDB(
         pid=pid,
         pid_uuid=generated_uuid,
@@ -154,85 +149,69 @@ def post_vergadering(
         organisatie_naam=organisatie.naam,
         dossiertype=vergadering.dossiertype,
         naam=vergadering.naam,
-        aanvang=vergadering.aanvang,
+        aanvang=stored_datetime(vergadering.aanvang),
         hoofdvergadering_id=hoofdvergadering_id,
-        einde=vergadering.einde,
-        gremium_identificatie=vergadering.georganiseerddoorgremium.gremiumidentificatie if vergadering.georganiseerddoorgremium else None,
-        gremium_naam=vergadering.georganiseerddoorgremium.gremiumnaam if vergadering.georganiseerddoorgremium else None,
-        geplandeaanvang=vergadering.geplandeaanvang,
-        geplandeeinde=vergadering.geplandeeinde,
+        einde=stored_datetime(vergadering.einde),
+        gremium_identificatie=gremium.gremiumidentificatie if gremium else None,
+        gremium_naam=gremium.gremiumnaam if gremium else None,
+        geplandeaanvang=stored_datetime(vergadering.geplandeaanvang),
+        geplandeeinde=stored_datetime(vergadering.geplandeeinde),
         geplandedatum=vergadering.geplandedatum,
         locatie=vergadering.locatie,
         vergaderstatus=vergadering.vergaderstatus,
         vergadertoelichting=vergadering.vergadertoelichting,
         vergaderdatum=vergadering.vergaderdatum,
         vergaderingstype=vergadering.vergaderingstype,
+        agendapunten=[],
     )
     
+    # Flush to run the INSERT, then serialize from the in-memory object before the commit
+    # expires it; this avoids reloading the row that was just written
     session.add(db_vergadering)
+    session.flush()
+    result = _db_to_dict(db_vergadering)
     session.commit()
-    session.refresh(db_vergadering)
-    
-    # Reload with relationships
-    statement = select(VergaderingDB).where(VergaderingDB.id == db_vergadering.id).options(
-        selectinload(VergaderingDB.agendapunten).selectinload(AgendapuntDB.informatieobjecten)
-    )
-    db_vergadering = session.exec(statement).first()
     
-    return db_to_schema(db_vergadering)
+    return ORJSONResponse(result, status_code=status.HTTP_201_CREATED)
 
 
-@router.get("/{id}", response_model=Vergadering)
-def get_vergadering(id: str, session: Session = Depends(get_session)):
+@router.get("/{id}", response_class=ORJSONResponse, responses={200: {"model": Vergadering}})
+def get_vergadering(id: uuid.UUID, session: Session = Depends(get_read_session)):
     """Een specifieke vergadering opvragen"""
-    statement = select(VergaderingDB).where(VergaderingDB.pid_uuid == id).options(
-        selectinload(VergaderingDB.agendapunten).selectinload(AgendapuntDB.informatieobjecten)
+    vergadering = get_or_404(
+        session, VergaderingDB, id, selectinload(VergaderingDB.agendapunten).selectinload(AgendapuntDB.informatieobjecten)
     )
-    vergadering = session.exec(statement).first()
     
-    if not vergadering:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="De gevraagde resource is niet gevonden.",
-        )
-    
-    return db_to_schema(vergadering)
+    return ORJSONResponse(_db_to_dict(vergadering))
 
 
-@router.put("/{id}", response_model=Vergadering, status_code=status.HTTP_201_CREATED)
+@router.put(
+    "/{id}",
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={201: {"model": Vergadering}},
+)
 def put_vergadering(
-    id: str,
+    id: uuid.UUID,
     vergadering: Vergadering,
     session: Session = Depends(get_session),
 ):
     """Het wijzigen van een vergadering"""
-    statement = select(VergaderingDB).where(VergaderingDB.pid_uuid == id)
-    db_vergadering = session.exec(statement).first()
+    db_vergadering = get_or_404(
+        session, VergaderingDB, id, selectinload(VergaderingDB.agendapunten).selectinload(AgendapuntDB.informatieobjecten)
+    )
     
-    if not db_vergadering:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="De gevraagde resource is niet gevonden.",
-        )
+    pid_uuid = updated_pid_uuid(session, VergaderingDB, db_vergadering.pid_uuid, vergadering.pid_uuid)
     
     # Update fields
     organisatie = vergadering.organisatie
-    if isinstance(organisatie, Gemeente):
-        db_vergadering.organisatie_type = "gemeente"
-        db_vergadering.organisatie_code = organisatie.gemeente
-    elif isinstance(organisatie, Provincie):
-        db_vergadering.organisatie_type = "provincie"
-        db_vergadering.organisatie_code = organisatie.provincie
-    else:
-        db_vergadering.organisatie_type = "waterschap"
-        db_vergadering.organisatie_code = organisatie.waterschap
-    
+    db_vergadering.organisatie_type, db_vergadering.organisatie_code = organisatie_type_en_code(organisatie)
     db_vergadering.organisatie_naam = organisatie.naam
     db_vergadering.webpaginalink = vergadering.webpaginalink
     db_vergadering.dossiertype = vergadering.dossiertype
     db_vergadering.naam = vergadering.naam
-    db_vergadering.pid_uuid = vergadering.pid_uuid
-    db_vergadering.aanvang = vergadering.aanvang
+    db_vergadering.pid_uuid = pid_uuid
+    db_vergadering.aanvang = stored_datetime(vergadering.aanvang)
     
     # Try to convert id to int, otherwise skip
     if vergadering.hoofdvergadering:
@@ -242,11 +221,12 @@ def put_vergadering(
             pass  # External reference
     else:
         db_vergadering.hoofdvergadering_id = None
-    db_vergadering.einde = vergadering.einde
-    db_vergadering.gremium_identificatie = vergadering.georganiseerddoorgremium.gremiumidentificatie if vergadering.georganiseerddoorgremium else None
-    db_vergadering.gremium_naam = vergadering.georganiseerddoorgremium.gremiumnaam if vergadering.georganiseerddoorgremium else None
-    db_vergadering.geplandeaanvang = vergadering.geplandeaanvang
-    db_vergadering.geplandeeinde = vergadering.geplandeeinde
+    db_vergadering.einde = stored_datetime(vergadering.einde)
+    gremium = vergadering.georganiseerddoorgremium
+    db_vergadering.gremium_identificatie = gremium.gremiumidentificatie if gremium else None
+    db_vergadering.gremium_naam = gremium.gremiumnaam if gremium else None
+    db_vergadering.geplandeaanvang = stored_datetime(vergadering.geplandeaanvang)
+    db_vergadering.geplandeeinde = stored_datetime(vergadering.geplandeeinde)
     db_vergadering.geplandedatum = vergadering.geplandedatum
     db_vergadering.locatie = vergadering.locatie
     db_vergadering.vergaderstatus = vergadering.vergaderstatus
@@ -254,24 +234,19 @@ def put_vergadering(
     db_vergadering.vergaderdatum = vergadering.vergaderdatum
     db_vergadering.vergaderingstype = vergadering.vergaderingstype
     
+    # The relationships were loaded with the lookup, so serialize before the commit expires them
     session.add(db_vergadering)
+    session.flush()
+    result = _db_to_dict(db_vergadering)
     session.commit()
-    session.refresh(db_vergadering)
     
-    return db_to_schema(db_vergadering)
+    return ORJSONResponse(result, status_code=status.HTTP_201_CREATED)
 
 
 @router.delete("/{id}", status_code=status.HTTP_200_OK)
-def del_vergadering(id: str, session: Session = Depends(get_session)):
+def del_vergadering(id: uuid.UUID, session: Session = Depends(get_session)):
     """Het bericht voor het verwijderen van een vergadering"""
-    statement = select(VergaderingDB).where(VergaderingDB.pid_uuid == id)
-    vergadering = session.exec(statement).first()
-    
-    if not vergadering:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="De gevraagde resource is niet gevonden.",
-        )
+    vergadering = get_or_404(session, VergaderingDB, id)
     
     session.delete(vergadering)
     session.commit()
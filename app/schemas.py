@@ -1,4 +1,4 @@
-from typing import Optional, List, Union
+from typing import Optional, List, Tuple, Union
 from datetime import datetime, date
 from pydantic import BaseModel, Field
 
@@ -21,6 +21,24 @@ class Waterschap(BaseModel):
 
 Organisatie = Union[Gemeente, Provincie, Waterschap]
 
+# Organisatie type per schema; the type is also the name of the field holding its code
+ORGANISATIE_TYPES = {
+    Gemeente: "gemeente",
+    Provincie: "provincie",
+    Waterschap: "waterschap",
+}
+
+
+def organisatie_type_en_code(organisatie: Organisatie) -> Tuple[str, str]:
+    """Split an organisatie into the type and code stored in the database"""
+    org_type = ORGANISATIE_TYPES[type(organisatie)]
+    return org_type, getattr(organisatie, org_type)
+
+
+def stored_datetime(value: Optional[datetime]) -> Optional[datetime]:
+    """The datetime as the database returns it: the columns keep no offset, only the wall-clock time"""
+    return value.replace(tzinfo=None) if value is not None else None
+
 
 # Gremium schema
 class Gremium(BaseModel):
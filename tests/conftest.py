@@ -0,0 +1,6 @@
+import os
+
+# The test client runs the app's lifespan, which creates the tables on the app's own
+# engine; point that engine at an in-memory database instead of ./ori_api.db
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.pop("DATABASE_READ_URL", None)
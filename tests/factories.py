@@ -0,0 +1,84 @@
+import itertools
+import uuid
+from datetime import date
+
+from app.models import VergaderingDB, AgendapuntDB, InformatieObjectDB
+
+# Server the tests expect in pids and references
+API_SERVER = "http://localhost:8000"
+VERGADERING_PREFIX = f"{API_SERVER}/vergaderingen/"
+AGENDAPUNT_PREFIX = f"{API_SERVER}/agendapunten/"
+INFORMATIEOBJECT_PREFIX = f"{API_SERVER}/informatieobjecten/"
+
+# Distinct uuids for test data; cheaper and more predictable than calling uuid4() per row
+_UUIDS = (str(uuid.UUID(int=i)) for i in itertools.count(1))
+
+# Organisatie of the test data, unless a test overrides it
+_GEMEENTE_AMSTERDAM = {
+    "organisatie_type": "gemeente",
+    "organisatie_code": "gm0363",
+    "organisatie_naam": "Gemeente Amsterdam",
+}
+
+
+def new_uuid() -> str:
+    """Get a uuid that no other test data uses"""
+    return next(_UUIDS)
+
+
+def vergadering_row(naam: str = "Raadsvergadering", **overrides) -> dict:
+    """Column values of a vergadering of Gemeente Amsterdam with a new pid"""
+    pid_uuid = overrides.pop("pid_uuid", None) or new_uuid()
+    return {
+        "pid": VERGADERING_PREFIX + pid_uuid,
+        "pid_uuid": pid_uuid,
+        **_GEMEENTE_AMSTERDAM,
+        "dossiertype": "vergadering",
+        "naam": naam,
+        **overrides,
+    }
+
+
+def agendapunt_row(agendapuntnaam: str = "Agendapunt", **overrides) -> dict:
+    """Column values of an agendapunt of Gemeente Amsterdam with a new pid"""
+    pid_uuid = overrides.pop("pid_uuid", None) or new_uuid()
+    return {
+        "pid": AGENDAPUNT_PREFIX + pid_uuid,
+        "pid_uuid": pid_uuid,
+        **_GEMEENTE_AMSTERDAM,
+        "dossiertype": "agendapunt",
+        "agendapuntnaam": agendapuntnaam,
+        **overrides,
+    }
+
+
+def informatieobject_row(titel: str = "Document", **overrides) -> dict:
+    """Column values of an informatieobject of Gemeente Amsterdam with a new pid"""
+    pid_uuid = overrides.pop("pid_uuid", None) or new_uuid()
+    return {
+        "pid": INFORMATIEOBJECT_PREFIX + pid_uuid,
+        "pid_uuid": pid_uuid,
+        **_GEMEENTE_AMSTERDAM,
+        "titel": titel,
+        "wooinformatiecategorie": "c_db4862c3",
+        "datumingediend": date(2017, 2, 9),
+        "webpaginalink": "https://example.com/doc",
+        **overrides,
+    }
+
+
+# The make_* builders also accept relationships (vergadering=..., informatieobjecten=[...]);
+# the *_row dicts are for Core inserts of rows a test only needs to be present
+def make_vergadering(naam: str = "Raadsvergadering", **overrides) -> VergaderingDB:
+    """Build a vergadering of Gemeente Amsterdam with a new pid"""
+    return VergaderingDB(**vergadering_row(naam, **overrides))
+
+
+def make_agendapunt(agendapuntnaam: str = "Agendapunt", **overrides) -> AgendapuntDB:
+    """Build an agendapunt of Gemeente Amsterdam with a new pid"""
+    return AgendapuntDB(**agendapunt_row(agendapuntnaam, **overrides))
+
+
+def make_informatieobject(titel: str = "Document", **overrides) -> InformatieObjectDB:
+    """Build an informatieobject of Gemeente Amsterdam with a new pid"""
+    return InformatieObjectDB(**informatieobject_row(titel, **overrides))
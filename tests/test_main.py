@@ -1,684 +1,729 @@
+import base64
+import orjson
 import pytest
-import uuid
+import re
 import datetime
-from datetime import date
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel import Session, SQLModel, create_engine, func, select
 from sqlmodel.pool import StaticPool
+from sqlalchemy import event, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
 
 from app.main import app
-from app.database import get_session
-from app.models import VergaderingDB, AgendapuntDB, InformatieObjectDB
-
-
-@pytest.fixture(name="session")
-def session_fixture():
-    """Create an in-memory test database"""
+from app.database import get_session, get_read_session
+from app.models import VergaderingDB, AgendapuntDB, InformatieObjectDB, AgendapuntInformatieObjectLink
+from tests.factories import (
+    API_SERVER,
+    VERGADERING_PREFIX,
+    agendapunt_row,
+    informatieobject_row,
+    make_agendapunt,
+    make_informatieobject,
+    make_vergadering,
+    new_uuid,
+    vergadering_row,
+)
+
+# Canonical lowercase uuid, as the API returns it
+_UUID_RE = re.compile(r"\A[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\Z")
+
+
+# Request payloads shared by the tests; the client serializes them without changing them
+_ORG = {"gemeente": "gm0363", "naam": "Gemeente Amsterdam"}
+_CREATE_VERGADERING = {"organisatie": _ORG, "dossiertype": "vergadering", "naam": "Raadsvergadering"}
+_CREATE_AGENDAPUNT = {
+    "organisatie": _ORG,
+    "dossiertype": "agendapunt",
+    "agendapuntnaam": "Begrotingsbespreking",
+    "vergadering": {"id": "1", "url": VERGADERING_PREFIX + "1"},
+}
+_CREATE_INFORMATIEOBJECT = {
+    "organisatie": _ORG,
+    "webpaginalink": "https://example.com/document",
+    "titel": "Testdocument",
+    "wooinformatiecategorie": "c_db4862c3",
+    "datumingediend": "2025-12-15",
+}
+
+
+@contextmanager
+def _captured_statements(session: Session):
+    """Collect the SQL statements run on the session's connection until the block ends"""
+    statements = []
+
+    def capture_statement(conn, cursor, statement, parameters, context, executemany):
+        # SAVEPOINTs belong to the test's own transaction, not to the endpoint
+        if not statement.startswith("SAVEPOINT"):
+            statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture_statement)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture_statement)
+
+
+def _json(response):
+    """Parse a response body with orjson, which is faster than response.json()"""
+    return orjson.loads(response.content)
+
+
+@pytest.fixture(name="engine", scope="session")
+def engine_fixture():
+    """Create the in-memory test database once for the whole test run.
+
+    Under pytest-xdist every worker is its own process, so each gets a database of its own.
+    """
     engine = create_engine(
         "sqlite://",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
+
+    # Let SQLAlchemy emit BEGIN itself, so SAVEPOINTs work with pysqlite
+    @event.listens_for(engine, "connect")
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin_transaction(conn):
+        conn.exec_driver_sql("BEGIN")
+
     SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    """Create a session inside a transaction that is rolled back after the test.
+
+    Test setup only flushes, and commits in the endpoints only release a SAVEPOINT,
+    so the test database is empty again without deleting any rows.
+    """
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        # The endpoints use this session too, so it keeps the default expire_on_commit of production
+        with Session(bind=connection, join_transaction_mode="create_savepoint") as session:
+            yield session
+        transaction.rollback()
+
+
+@pytest.fixture(name="shared_client", scope="session")
+def shared_client_fixture():
+    """Create one test client for the whole test run, running the app's lifespan once"""
+    with TestClient(app) as shared_client:
+        yield shared_client
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
-    """Create a test client with overridden database session"""
+def client_fixture(shared_client: TestClient, session: Session):
+    """Point the test client at the session of the current test"""
     def get_session_override():
         return session
 
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_read_session] = get_session_override
 
-    client = TestClient(app)
-    yield client
+    yield shared_client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(name="vergadering_with_agendapunten")
+def vergadering_with_agendapunten_fixture(session: Session):
+    """Add a vergadering with n agendapunten to the session of the current test"""
+    def make(n: int = 2):
+        vergadering = make_vergadering("Raadsvergadering")
+        agendapunten = [make_agendapunt(f"Agendapunt {i}", vergadering=vergadering) for i in range(1, n + 1)]
+        session.add_all([vergadering, *agendapunten])
+        return vergadering, agendapunten
+
+    return make
+
+
 # Test root endpoint
 def test_root_endpoint(client: TestClient):
     """Test that root endpoint returns expected response"""
     response = client.get("/")
     assert response.status_code == 200
-    data = response.json()
+    data = _json(response)
     assert "message" in data
     assert data["version"] == "0.1.0"
 
 
-# Vergadering tests
-def test_create_vergadering(client: TestClient):
-    """Test creating a new vergadering"""
-    response = client.post(
-        "/vergaderingen",
-        json={
-            "organisatie": {"gemeente": "gm0363", "naam": "Gemeente Amsterdam"},
-            "dossiertype": "vergadering",
-            "naam": "Raadsvergadering",
-        }
-    )
+def test_openapi_schema(client: TestClient):
+    """Test that the cached OpenAPI schema is served and used by the docs"""
+    response = client.get("/openapi.json")
+    assert response.status_code == 200
+    assert _json(response) == app.openapi()
+    
+    response = client.get("/docs")
+    assert response.status_code == 200
+    assert "/openapi.json" in response.text
+    
+    response = client.get("/docs/oauth2-redirect")
+    assert response.status_code == 200
+
+
+def test_docs_behind_root_path():
+    """Test that the docs pages point at the schema under the root_path of a proxy"""
+    proxied_client = TestClient(app, root_path="/ori")
+    
+    response = proxied_client.get("/docs")
+    assert "'/ori/openapi.json'" in response.text
+    assert "/ori/docs/oauth2-redirect" in response.text
+    
+    response = proxied_client.get("/redoc")
+    assert '"/ori/openapi.json"' in response.text
+    
+    # The schema lists the root_path as the first server, while the schema without a proxy does not
+    servers = _json(proxied_client.get("/openapi.json"))["servers"]
+    assert servers == [{"url": "/ori"}, *app.openapi()["servers"]]
+    assert _json(TestClient(app).get("/openapi.json"))["servers"] == app.openapi()["servers"]
+
+
+def test_pretty_json(session: Session, client: TestClient):
+    """Test that responses are compact by default and indented with ?pretty=1"""
+    agendapunt = make_agendapunt("Begrotingsbespreking")
+    session.add(agendapunt)
+    session.flush()
+    
+    for url in ["/", "/agendapunten"]:
+        compact = client.get(url)
+        pretty = client.get(url, params={"pretty": 1})
+        assert b"\n" not in compact.content
+        assert b'\n  "' in pretty.content
+        assert _json(pretty) == _json(compact)
+        assert int(pretty.headers["content-length"]) == len(pretty.content)
+    
+    # The value is read as a boolean, so False turns indenting off
+    for value in ["0", "false", "False", "nee"]:
+        assert b"\n" not in client.get("/", params={"pretty": value}).content
+    assert b"\n" in client.get("/", params={"pretty": "True"}).content
+
+
+# Create tests
+@pytest.mark.parametrize("endpoint,payload,name_key", [
+    ("vergaderingen", _CREATE_VERGADERING, "naam"),
+    ("agendapunten", _CREATE_AGENDAPUNT, "agendapuntnaam"),
+    ("informatieobjecten", _CREATE_INFORMATIEOBJECT, "titel"),
+])
+def test_create_resource(client: TestClient, endpoint: str, payload: dict, name_key: str):
+    """Test creating a new vergadering, agendapunt and informatieobject"""
+    response = client.post(f"/{endpoint}", json=payload)
     assert response.status_code == 201
-    data = response.json()
-    assert data["naam"] == "Raadsvergadering"
-    assert data["dossiertype"] == "vergadering"
+    data = _json(response)
+    assert data[name_key] == payload[name_key]
+    assert data.get("dossiertype") == payload.get("dossiertype")
     assert data["pid"] is not None
     assert data["pid_uuid"] is not None
     # PID should be a URL
-    assert data["pid"].startswith("http://localhost:8000/vergaderingen/")
+    assert data["pid"].startswith(f"{API_SERVER}/{endpoint}/")
     # PID_UUID should be a valid UUID
-    uuid.UUID(data["pid_uuid"])
+    assert _UUID_RE.match(data["pid_uuid"])
 
 
+# Vergadering tests
 def test_get_vergaderingen(session: Session, client: TestClient):
     """Test retrieving all vergaderingen"""
-    # Create test data
-    uuid1 = str(uuid.uuid4())
-    uuid2 = str(uuid.uuid4())
-    vergadering1 = VergaderingDB(
-        pid=f"http://localhost:8000/vergaderingen/{uuid1}",
-        pid_uuid=uuid1,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="vergadering",
-        naam="Raadsvergadering"
-    )
-    vergadering2 = VergaderingDB(
-        pid=f"http://localhost:8000/vergaderingen/{uuid2}",
-        pid_uuid=uuid2,
-        organisatie_type="provincie",
-        organisatie_code="pv27",
-        organisatie_naam="Provincie Groningen",
-        dossiertype="vergadering",
-        naam="Provinciale Vergadering"
-    )
-    session.add(vergadering1)
-    session.add(vergadering2)
-    session.commit()
+    # Create test data; the test needs no ORM objects, so insert plain rows
+    session.exec(insert(VergaderingDB), params=[
+        vergadering_row("Raadsvergadering"),
+        vergadering_row(
+            "Provinciale Vergadering",
+            organisatie_type="provincie",
+            organisatie_code="pv27",
+            organisatie_naam="Provincie Groningen",
+        ),
+    ])
 
     # Test the API
     response = client.get("/vergaderingen")
     assert response.status_code == 200
-    data = response.json()
-    assert len(data["results"]) == 2
-    assert data["results"][0]["naam"] == "Raadsvergadering"
-    assert data["results"][1]["naam"] == "Provinciale Vergadering"
+    data = _json(response)
+    assert [v["naam"] for v in data["results"]] == ["Raadsvergadering", "Provinciale Vergadering"]
 
 
 def test_get_vergadering(session: Session, client: TestClient):
     """Test retrieving a specific vergadering"""
-    test_uuid = str(uuid.uuid4())
-    test_pid = f"http://localhost:8000/vergaderingen/{test_uuid}"
-    vergadering = VergaderingDB(
-        pid=test_pid,
-        pid_uuid=test_uuid,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="vergadering",
-        naam="Raadsvergadering"
-    )
+    vergadering = make_vergadering("Raadsvergadering")
     session.add(vergadering)
-    session.commit()
+    session.flush()
 
     response = client.get(f"/vergaderingen/{vergadering.pid_uuid}")
     assert response.status_code == 200
-    data = response.json()
+    data = _json(response)
     assert data["naam"] == "Raadsvergadering"
-    assert data["pid"] == test_pid
-    assert data["pid_uuid"] == test_uuid
+    assert data["pid"] == vergadering.pid
+    assert data["pid_uuid"] == vergadering.pid_uuid
 
 
 def test_update_vergadering(session: Session, client: TestClient):
     """Test updating a vergadering"""
-    test_uuid = str(uuid.uuid4())
-    test_pid = f"http://localhost:8000/vergaderingen/{test_uuid}"
-    vergadering = VergaderingDB(
-        pid=test_pid,
-        pid_uuid=test_uuid,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="vergadering",
-        naam="Oude Naam"
-    )
+    vergadering = make_vergadering("Oude Naam")
     session.add(vergadering)
-    session.commit()
+    session.flush()
 
     response = client.put(
         f"/vergaderingen/{vergadering.pid_uuid}",
         json={
-            "organisatie": {"gemeente": "gm0363", "naam": "Gemeente Amsterdam"},
-            "dossiertype": "vergadering",
+            **_CREATE_VERGADERING,
             "naam": "Nieuwe Naam",
             "pid": vergadering.pid,
             "pid_uuid": vergadering.pid_uuid,
         }
     )
     assert response.status_code == 201
-    data = response.json()
+    data = _json(response)
     assert data["naam"] == "Nieuwe Naam"
 
 
 def test_delete_vergadering(session: Session, client: TestClient):
     """Test deleting a vergadering"""
-    test_uuid = str(uuid.uuid4())
-    test_pid = f"http://localhost:8000/vergaderingen/{test_uuid}"
-    vergadering = VergaderingDB(
-        pid=test_pid,
-        pid_uuid=test_uuid,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="vergadering",
-        naam="Te Verwijderen Vergadering"
-    )
+    vergadering = make_vergadering("Te Verwijderen Vergadering")
     session.add(vergadering)
-    session.commit()
+    session.flush()
 
     response = client.delete(f"/vergaderingen/{vergadering.pid_uuid}")
     assert response.status_code == 200
 
-    vergadering_in_db = session.get(VergaderingDB, vergadering.id)
-    assert vergadering_in_db is None
+    remaining = session.scalar(
+        select(func.count()).select_from(VergaderingDB).where(VergaderingDB.id == vergadering.id)
+    )
+    assert remaining == 0
+
+
+def test_get_vergaderingen_paginated(session: Session, client: TestClient):
+    """Test that vergaderingen are returned in pages linked through the next URL"""
+    session.add_all([make_vergadering(f"Vergadering {i}") for i in range(3)])
+    session.flush()
+
+    response = client.get("/vergaderingen", params={"limit": 2})
+    assert response.status_code == 200
+    data = _json(response)
+    assert [v["naam"] for v in data["results"]] == ["Vergadering 0", "Vergadering 1"]
+    assert data["next"].startswith(f"{API_SERVER}/vergaderingen?")
+
+    response = client.get(data["next"].removeprefix(API_SERVER))
+    assert response.status_code == 200
+    data = _json(response)
+    assert [v["naam"] for v in data["results"]] == ["Vergadering 2"]
+    assert data["next"] is None
+
+
+def test_get_vergaderingen_query_count_independent_of_rows(session: Session, client: TestClient):
+    """Test that listing vergaderingen eager loads agendapunten and informatieobjecten instead of one query per row"""
+    session.add_all([
+        make_agendapunt(
+            f"Agendapunt {i}",
+            vergadering=make_vergadering(f"Vergadering {i}"),
+            informatieobjecten=[make_informatieobject(f"Document {i}")],
+        )
+        for i in range(5)
+    ])
+    session.flush()
+
+    with _captured_statements(session) as statements:
+        response = client.get("/vergaderingen")
+
+    assert response.status_code == 200
+    data = _json(response)
+    assert len(data["results"]) == 5
+    assert all(len(v["informatieobjecten"]) == 1 for v in data["results"])
+    # One SELECT each for the vergaderingen, their agendapunten and those agendapunten's informatieobjecten
+    assert len(statements) == 3
 
 
 # Agendapunt tests
-def test_create_agendapunt(client: TestClient):
-    """Test creating a new agendapunt"""
-    response = client.post(
-        "/agendapunten",
-        json={
-            "organisatie": {"gemeente": "gm0363", "naam": "Gemeente Amsterdam"},
-            "dossiertype": "agendapunt",
-            "agendapuntnaam": "Begrotingsbespreking",
-            "vergadering": {"id": "1", "url": "http://localhost:8000/vergaderingen/1"},
-        }
-    )
+def test_agendapunt_pid_uuid_stored_as_blob(session: Session, client: TestClient):
+    """Test that the agendapunt pid_uuid is stored in 16 bytes and still looked up by its string form"""
+    response = client.post("/agendapunten", json=_CREATE_AGENDAPUNT)
+    pid_uuid = _json(response)["pid_uuid"]
+    
+    stored = session.exec(text("SELECT typeof(pid_uuid), length(pid_uuid) FROM agendapunten")).one()
+    assert tuple(stored) == ("blob", 16)
+    
+    response = client.get(f"/agendapunten/{pid_uuid}")
+    assert response.status_code == 200
+    assert _json(response)["pid_uuid"] == pid_uuid
+    
+    response = client.get(f"/agendapunten/{pid_uuid.upper()}")
+    assert response.status_code == 200
+
+
+def test_agendapunt_pid_uuid_column_type_per_dialect():
+    """Test that the agendapunt pid_uuid is a binary type on every supported database"""
+    column_type = AgendapuntDB.__table__.c.pid_uuid.type
+    assert column_type.compile(dialect=sqlite.dialect()) == "BLOB"
+    assert column_type.compile(dialect=postgresql.dialect()) == "BYTEA"
+
+
+def test_update_agendapunt_invalid_pid_uuid(session: Session, client: TestClient):
+    """Test that a PUT with a pid_uuid that is not a uuid returns 422, and an uppercase own pid_uuid is no conflict"""
+    data = _json(client.post("/agendapunten", json=_CREATE_AGENDAPUNT))
+
+    response = client.put(f"/agendapunten/{data['pid_uuid']}", json={**data, "pid_uuid": "geen-uuid"})
+    assert response.status_code == 422
+
+    response = client.put(f"/agendapunten/{data['pid_uuid']}", json={**data, "pid_uuid": data["pid_uuid"].upper()})
     assert response.status_code == 201
-    data = response.json()
-    assert data["agendapuntnaam"] == "Begrotingsbespreking"
-    assert data["dossiertype"] == "agendapunt"
-    assert data["pid"] is not None
-    assert data["pid_uuid"] is not None
-    # PID should be a URL
-    assert data["pid"].startswith("http://localhost:8000/agendapunten/")
-    # PID_UUID should be a valid UUID
-    uuid.UUID(data["pid_uuid"])
+    assert _json(response)["pid_uuid"] == data["pid_uuid"]
+
+
+def test_post_agendapunt_with_timezone_matches_get(client: TestClient):
+    """Test that a POST with tz-aware datetimes returns them as a later GET does"""
+    response = client.post("/agendapunten", json={
+        **_CREATE_AGENDAPUNT,
+        "starttijd": "2024-01-01T10:00:00+02:00",
+        "eindtijd": "2024-01-01T11:00:00Z",
+    })
+    assert response.status_code == 201
+    data = _json(response)
+    assert data["starttijd"] == "2024-01-01T10:00:00"
+    assert data == _json(client.get(f"/agendapunten/{data['pid_uuid']}"))
+
+
+@pytest.mark.parametrize("endpoint,payload,field", [
+    ("agendapunten", _CREATE_AGENDAPUNT, "starttijd"),
+    ("vergaderingen", _CREATE_VERGADERING, "aanvang"),
+])
+def test_write_with_timezone_matches_get(client: TestClient, endpoint: str, payload: dict, field: str):
+    """Test that POST and PUT with a tz-aware datetime return it as a later GET does"""
+    response = client.post(f"/{endpoint}", json={**payload, field: "2024-01-01T10:00:00Z"})
+    assert response.status_code == 201
+    data = _json(response)
+    assert data == _json(client.get(f"/{endpoint}/{data['pid_uuid']}"))
+
+    response = client.put(f"/{endpoint}/{data['pid_uuid']}", json={**data, field: "2024-01-01T10:00:00+01:00"})
+    assert response.status_code == 201
+    data = _json(response)
+    assert data[field] == "2024-01-01T10:00:00"
+    assert data == _json(client.get(f"/{endpoint}/{data['pid_uuid']}"))
+
+
+def test_agendapunt_legacy_text_pid_uuid_is_read(session: Session, client: TestClient):
+    """Test that an agendapunt pid_uuid left as text by an older database is still listed"""
+    row = agendapunt_row("Oud agendapunt")
+    session.exec(insert(AgendapuntDB), params=[row])
+    session.exec(text("UPDATE agendapunten SET pid_uuid = :pid_uuid"), params={"pid_uuid": row["pid_uuid"]})
+
+    response = client.get("/agendapunten")
+    assert response.status_code == 200
+    assert [ap["pid_uuid"] for ap in _json(response)["results"]] == [row["pid_uuid"]]
 
 
 def test_get_agendapunten(session: Session, client: TestClient):
     """Test retrieving all agendapunten"""
-    uuid1 = str(uuid.uuid4())
-    uuid2 = str(uuid.uuid4())
-    agendapunt1 = AgendapuntDB(
-        pid=f"http://localhost:8000/agendapunten/{uuid1}",
-        pid_uuid=uuid1,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="agendapunt",
-        agendapuntnaam="Agendapunt 1",
-        vergadering_id=None,
-    )
-    agendapunt2 = AgendapuntDB(
-        pid=f"http://localhost:8000/agendapunten/{uuid2}",
-        pid_uuid=uuid2,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="agendapunt",
-        agendapuntnaam="Agendapunt 2",
-        vergadering_id=None,
-    )
-    session.add(agendapunt1)
-    session.add(agendapunt2)
-    session.commit()
+    session.exec(insert(AgendapuntDB), params=[
+        agendapunt_row("Agendapunt 1"),
+        agendapunt_row("Agendapunt 2"),
+    ])
 
     response = client.get("/agendapunten")
     assert response.status_code == 200
-    data = response.json()
-    assert len(data["results"]) == 2
+    data = _json(response)
+    assert [ap["agendapuntnaam"] for ap in data["results"]] == ["Agendapunt 1", "Agendapunt 2"]
 
 
-# Informatieobject tests
-def test_create_informatieobject(client: TestClient):
-    """Test creating a new informatieobject"""
-    response = client.post(
-        "/informatieobjecten",
-        json={
-            "organisatie": {"gemeente": "gm0363", "naam": "Gemeente Amsterdam"},
-            "webpaginalink": "https://example.com/document",
-            "titel": "Testdocument",
-            "wooinformatiecategorie": "c_db4862c3",
-            "datumingediend": "2025-12-15",
-        }
+def test_get_agendapunten_filtered_by_vergadering(session: Session, client: TestClient):
+    """Test filtering agendapunten by vergadering pid, and 404 for an unknown vergadering"""
+    vergadering1 = make_vergadering("Raadsvergadering 1")
+    vergadering2 = make_vergadering("Raadsvergadering 2")
+    agendapunt = make_agendapunt("Agendapunt 1", vergadering=vergadering1)
+    session.add_all([vergadering1, vergadering2, agendapunt])
+    session.flush()
+
+    response = client.get("/agendapunten", params={"vergadering_pid": vergadering1.pid})
+    assert response.status_code == 200
+    data = _json(response)
+    assert [ap["pid_uuid"] for ap in data["results"]] == [agendapunt.pid_uuid]
+
+    # Existing vergadering without agendapunten gives an empty list
+    response = client.get("/agendapunten", params={"vergadering_pid": vergadering2.pid})
+    assert response.status_code == 200
+    assert _json(response)["results"] == []
+
+    response = client.get(
+        "/agendapunten",
+        params={"vergadering_pid": VERGADERING_PREFIX + new_uuid()},
     )
-    assert response.status_code == 201
-    data = response.json()
-    assert data["titel"] == "Testdocument"
-    assert data["pid"] is not None
-    assert data["pid_uuid"] is not None
-    # PID should be a URL
-    assert data["pid"].startswith("http://localhost:8000/informatieobjecten/")
-    # PID_UUID should be a valid UUID
-    uuid.UUID(data["pid_uuid"])
+    assert response.status_code == 404
+
+
+def test_get_agendapunten_paginated(session: Session, client: TestClient):
+    """Test that agendapunten are returned in pages linked through the next URL"""
+    session.add_all([make_agendapunt(f"Agendapunt {i}") for i in range(3)])
+    session.flush()
+
+    response = client.get("/agendapunten", params={"limit": 2})
+    assert response.status_code == 200
+    data = _json(response)
+    assert [ap["agendapuntnaam"] for ap in data["results"]] == ["Agendapunt 0", "Agendapunt 1"]
+    assert data["next"].startswith(f"{API_SERVER}/agendapunten?")
+
+    response = client.get(data["next"].removeprefix(API_SERVER))
+    assert response.status_code == 200
+    data = _json(response)
+    assert [ap["agendapuntnaam"] for ap in data["results"]] == ["Agendapunt 2"]
+    assert data["next"] is None
+
+    response = client.get("/agendapunten", params={"cursor": "geen-cursor"})
+    assert response.status_code == 400
+
+    # A cursor for an id beyond the 64-bit range of the database
+    too_large = base64.urlsafe_b64encode(str(2**63).encode()).decode().rstrip("=")
+    response = client.get("/agendapunten", params={"cursor": too_large})
+    assert response.status_code == 400
+
+
+def test_get_agendapunten_query_count_independent_of_rows(session: Session, client: TestClient):
+    """Test that listing agendapunten eager loads informatieobjecten instead of one query per row"""
+    session.add_all([
+        make_agendapunt(f"Agendapunt {i}", informatieobjecten=[make_informatieobject(f"Document {i}")])
+        for i in range(5)
+    ])
+    session.flush()
+
+    with _captured_statements(session) as statements:
+        response = client.get("/agendapunten")
+
+    assert response.status_code == 200
+    data = _json(response)
+    assert len(data["results"]) == 5
+    assert all(len(ap["informatieobjecten"]) == 1 for ap in data["results"])
+    # One SELECT for the agendapunten and one for all their informatieobjecten
+    assert len(statements) == 2
+
+
+# Informatieobject tests
+def test_informatieobject_organisatie_types(client: TestClient):
+    """Test that every organisatie type is stored and returned unchanged on POST and PUT"""
+    organisaties = [
+        _ORG,
+        {"provincie": "pv27", "naam": "Provincie Groningen"},
+        {"waterschap": "ws0654", "naam": "Waterschap Aa en Maas"},
+    ]
+    response = client.post("/informatieobjecten", json=_CREATE_INFORMATIEOBJECT)
+    data = _json(response)
+    assert data["organisatie"] == organisaties[0]
+
+    for organisatie in organisaties[1:]:
+        response = client.put(
+            f"/informatieobjecten/{data['pid_uuid']}",
+            json={**data, "organisatie": organisatie},
+            headers={"X-Reason": "Organisatie gewijzigd"},
+        )
+        assert response.status_code == 201
+        assert _json(response)["organisatie"] == organisatie
+        assert _json(client.get(f"/informatieobjecten/{data['pid_uuid']}"))["organisatie"] == organisatie
 
 
 def test_get_informatieobjecten(session: Session, client: TestClient):
     """Test retrieving all informatieobjecten"""
-    uuid1 = str(uuid.uuid4())
-    uuid2 = str(uuid.uuid4())
-    obj1 = InformatieObjectDB(
-        pid=f"http://localhost:8000/informatieobjecten/{uuid1}",
-        pid_uuid=uuid1,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        webpaginalink="https://example.com/doc1",
-        titel="Document 1",
-        wooinformatiecategorie="c_db4862c3",
-        datumingediend=datetime.date.today(),
-    )
-    obj2 = InformatieObjectDB(
-        pid=f"http://localhost:8000/informatieobjecten/{uuid2}",
-        pid_uuid=uuid2,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        webpaginalink="https://example.com/doc2",
-        titel="Document 2",
-        wooinformatiecategorie="c_db4862c3",
-        datumingediend=datetime.date.today(),
-    )
-    session.add(obj1)
-    session.add(obj2)
-    session.commit()
+    session.exec(insert(InformatieObjectDB), params=[
+        informatieobject_row(
+            "Document 1",
+            webpaginalink="https://example.com/doc1",
+            datumingediend=datetime.date.today(),
+        ),
+        informatieobject_row(
+            "Document 2",
+            webpaginalink="https://example.com/doc2",
+            datumingediend=datetime.date.today(),
+        ),
+    ])
 
     response = client.get("/informatieobjecten")
     assert response.status_code == 200
-    data = response.json()
-    assert len(data["results"]) == 2
+    data = _json(response)
+    assert [io["titel"] for io in data["results"]] == ["Document 1", "Document 2"]
+
+
+def test_get_informatieobjecten_paginated(session: Session, client: TestClient):
+    """Test that informatieobjecten are returned in pages linked through the next URL"""
+    session.add_all([make_informatieobject(f"Document {i}") for i in range(3)])
+    session.flush()
+
+    response = client.get("/informatieobjecten", params={"limit": 2})
+    assert response.status_code == 200
+    data = _json(response)
+    assert [io["titel"] for io in data["results"]] == ["Document 0", "Document 1"]
+    assert data["next"].startswith(f"{API_SERVER}/informatieobjecten?")
+
+    response = client.get(data["next"].removeprefix(API_SERVER))
+    assert response.status_code == 200
+    data = _json(response)
+    assert [io["titel"] for io in data["results"]] == ["Document 2"]
+    assert data["next"] is None
 
 
 # Error handling tests
 def test_get_nonexistent_vergadering(client: TestClient):
     """Test that getting a non-existent vergadering returns 404"""
-    nonexistent_uuid = str(uuid.uuid4())
+    nonexistent_uuid = new_uuid()
     response = client.get(f"/vergaderingen/{nonexistent_uuid}")
     assert response.status_code == 404
-    data = response.json()
+    data = _json(response)
     assert "detail" in data
 
 
-def test_create_vergadering_missing_required_field(client: TestClient):
-    """Test that creating vergadering without required fields returns 422"""
-    response = client.post(
-        "/vergaderingen",
-        json={
-            "organisatie": {"gemeente": "gm0363", "naam": "Gemeente Amsterdam"},
-            # missing dossiertype and naam
-        }
-    )
+def test_invalid_id_rejected_without_query(session: Session, client: TestClient):
+    """Test that an id that is not a uuid returns 422 without querying the database"""
+    with _captured_statements(session) as statements:
+        responses = [
+            client.get("/agendapunten/geen-uuid"),
+            client.get("/informatieobjecten/geen-uuid"),
+            client.get("/vergaderingen/geen-uuid"),
+        ]
+
+    assert all(response.status_code == 422 for response in responses)
+    assert statements == []
+
+
+# Only the organisatie is given; every other required field is missing
+@pytest.mark.parametrize("endpoint", ["vergaderingen", "agendapunten", "informatieobjecten"])
+def test_create_missing_required_field(client: TestClient, endpoint: str):
+    """Test that creating a resource without required fields returns 422"""
+    response = client.post(f"/{endpoint}", json={"organisatie": _ORG})
     assert response.status_code == 422
 
 
-def test_create_agendapunt_missing_required_field(client: TestClient):
-    """Test that creating agendapunt without required fields returns 422"""
-    response = client.post(
-        "/agendapunten",
-        json={
-            "organisatie": {"gemeente": "gm0363", "naam": "Gemeente Amsterdam"},
-            # missing dossiertype, agendapuntnaam, and vergadering
-        }
+@pytest.mark.parametrize("endpoint,payload", [
+    ("vergaderingen", _CREATE_VERGADERING),
+    ("agendapunten", _CREATE_AGENDAPUNT),
+    ("informatieobjecten", _CREATE_INFORMATIEOBJECT),
+])
+def test_update_pid_uuid_of_other_resource_conflicts(client: TestClient, endpoint: str, payload: dict):
+    """Test that a PUT taking over the pid_uuid of another resource returns 409 and changes nothing"""
+    first = _json(client.post(f"/{endpoint}", json=payload))
+    second = _json(client.post(f"/{endpoint}", json=payload))
+
+    response = client.put(
+        f"/{endpoint}/{second['pid_uuid']}",
+        json={**second, "pid_uuid": first["pid_uuid"]},
+        headers={"X-Reason": "pid_uuid gewijzigd"},
     )
+    assert response.status_code == 409
+    assert _json(client.get(f"/{endpoint}/{first['pid_uuid']}"))["pid"] == first["pid"]
+    assert _json(client.get(f"/{endpoint}/{second['pid_uuid']}"))["pid"] == second["pid"]
+
+
+@pytest.mark.parametrize("endpoint,payload", [
+    ("vergaderingen", _CREATE_VERGADERING),
+    ("informatieobjecten", _CREATE_INFORMATIEOBJECT),
+])
+def test_update_pid_uuid_is_canonicalised(client: TestClient, endpoint: str, payload: dict):
+    """Test that a PUT with a non-uuid pid_uuid returns 422 and an uppercase one is stored lowercase"""
+    data = _json(client.post(f"/{endpoint}", json=payload))
+    headers = {"X-Reason": "pid_uuid gewijzigd"}
+
+    response = client.put(f"/{endpoint}/{data['pid_uuid']}", json={**data, "pid_uuid": "my-custom"}, headers=headers)
     assert response.status_code == 422
 
+    pid_uuid = new_uuid()
+    response = client.put(
+        f"/{endpoint}/{data['pid_uuid']}", json={**data, "pid_uuid": pid_uuid.upper()}, headers=headers
+    )
+    assert response.status_code == 201
+    assert _json(response)["pid_uuid"] == pid_uuid
+    assert _json(client.get(f"/{endpoint}/{pid_uuid}"))["pid_uuid"] == pid_uuid
 
-def test_vergadering_includes_agendapunten_references(session: Session, client: TestClient):
+
+def test_vergadering_includes_agendapunten_references(
+    session: Session, client: TestClient, vergadering_with_agendapunten
+):
     """Test that a vergadering response includes references to its agendapunten."""
-    # Create vergadering directly in database
-    vergadering_uuid = str(uuid.uuid4())
-    vergadering = VergaderingDB(
-        pid=f"http://localhost:8000/vergaderingen/{vergadering_uuid}",
-        pid_uuid=vergadering_uuid,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="vergadering",
-        naam="Raadsvergadering",
-    )
-    session.add(vergadering)
-    session.commit()
-    session.refresh(vergadering)
-    
-    # Create 2 agendapunten linked to this vergadering
-    uuid1 = str(uuid.uuid4())
-    uuid2 = str(uuid.uuid4())
-    agendapunt1 = AgendapuntDB(
-        pid=f"http://localhost:8000/agendapunten/{uuid1}",
-        pid_uuid=uuid1,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="agendapunt",
-        agendapuntnaam="Agendapunt 1",
-        vergadering_id=vergadering.id,
-    )
-    agendapunt2 = AgendapuntDB(
-        pid=f"http://localhost:8000/agendapunten/{uuid2}",
-        pid_uuid=uuid2,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="agendapunt",
-        agendapuntnaam="Agendapunt 2",
-        vergadering_id=vergadering.id,
-    )
-    session.add(agendapunt1)
-    session.add(agendapunt2)
-    session.commit()
+    # Create vergadering with 2 agendapunten directly in database
+    vergadering, (agendapunt1, agendapunt2) = vergadering_with_agendapunten(2)
+    session.flush()
     
     # Get vergadering and verify agendapunten field
     response = client.get(f"/vergaderingen/{vergadering.pid_uuid}")
     assert response.status_code == 200
-    data = response.json()
+    data = _json(response)
     
-    assert "agendapunten" in data
-    assert len(data["agendapunten"]) == 2
-    
-    # Verify format of URIs
-    api_server = "http://localhost:8000"
-    agendapunt_uuids = [uuid1, uuid2]
-    for uri in data["agendapunten"]:
-        assert uri.startswith(f"{api_server}/agendapunten/")
-        # Extract UUID and verify it's in our list
-        uri_uuid = uri.split("/")[-1]
-        assert uri_uuid in agendapunt_uuids
-        # Verify it's a valid UUID format
-        uuid.UUID(uri_uuid)
-
-
-def test_vergadering_includes_informatieobjecten_via_agendapunten(session: Session, client: TestClient):
+    # The references are the pid URIs of exactly these agendapunten, each listed once
+    assert sorted(data["agendapunten"]) == sorted([agendapunt1.pid, agendapunt2.pid])
+
+
+def test_vergadering_includes_informatieobjecten_via_agendapunten(
+    session: Session, client: TestClient, vergadering_with_agendapunten
+):
     """Test that a vergadering response includes informatieobjecten that are linked to its agendapunten."""
-    # Create vergadering
-    vergadering_uuid = str(uuid.uuid4())
-    vergadering = VergaderingDB(
-        pid=f"http://localhost:8000/vergaderingen/{vergadering_uuid}",
-        pid_uuid=vergadering_uuid,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="vergadering",
-        naam="Raadsvergadering",
-    )
-    session.add(vergadering)
-    session.commit()
-    session.refresh(vergadering)
-    
-    # Create 2 agendapunten linked to this vergadering
-    agp_uuid1 = str(uuid.uuid4())
-    agp_uuid2 = str(uuid.uuid4())
-    agendapunt1 = AgendapuntDB(
-        pid=f"http://localhost:8000/agendapunten/{agp_uuid1}",
-        pid_uuid=agp_uuid1,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="agendapunt",
-        agendapuntnaam="Agendapunt 1",
-        vergadering_id=vergadering.id,
-    )
-    agendapunt2 = AgendapuntDB(
-        pid=f"http://localhost:8000/agendapunten/{agp_uuid2}",
-        pid_uuid=agp_uuid2,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="agendapunt",
-        agendapuntnaam="Agendapunt 2",
-        vergadering_id=vergadering.id,
-    )
-    session.add(agendapunt1)
-    session.add(agendapunt2)
-    session.commit()
-    session.refresh(agendapunt1)
-    session.refresh(agendapunt2)
+    # Create vergadering with 2 agendapunten
+    vergadering, (agendapunt1, agendapunt2) = vergadering_with_agendapunten(2)
     
     # Create 3 informatieobjecten
-    info_uuid1 = str(uuid.uuid4())
-    info_uuid2 = str(uuid.uuid4())
-    info_uuid3 = str(uuid.uuid4())
-    informatieobject1 = InformatieObjectDB(
-        pid=f"http://localhost:8000/informatieobjecten/{info_uuid1}",
-        pid_uuid=info_uuid1,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        titel="Document 1",
-        wooinformatiecategorie="c_db4862c3",
-        datumingediend=date(2017, 2, 9),
+    informatieobject1 = make_informatieobject(
+        "Document 1",
         webpaginalink="https://example.com/doc1",
     )
-    informatieobject2 = InformatieObjectDB(
-        pid=f"http://localhost:8000/informatieobjecten/{info_uuid2}",
-        pid_uuid=info_uuid2,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        titel="Document 2",
-        wooinformatiecategorie="c_db4862c3",
-        datumingediend=date(2017, 2, 9),
+    informatieobject2 = make_informatieobject(
+        "Document 2",
         webpaginalink="https://example.com/doc2",
     )
-    informatieobject3 = InformatieObjectDB(
-        pid=f"http://localhost:8000/informatieobjecten/{info_uuid3}",
-        pid_uuid=info_uuid3,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        titel="Document 3",
-        wooinformatiecategorie="c_db4862c3",
-        datumingediend=date(2017, 2, 9),
+    informatieobject3 = make_informatieobject(
+        "Document 3",
         webpaginalink="https://example.com/doc3",
     )
-    session.add(informatieobject1)
-    session.add(informatieobject2)
-    session.add(informatieobject3)
-    session.commit()
-    session.refresh(informatieobject1)
-    session.refresh(informatieobject2)
-    session.refresh(informatieobject3)
+    # Flush once for the ids the link rows need
+    session.add_all([informatieobject1, informatieobject2, informatieobject3])
+    session.flush()
     
     # Link informatieobjecten to agendapunten via junction table
     # agendapunt1 linked to info1 and info2
     # agendapunt2 linked to info2 and info3
     # Expected result: vergadering should show all three informatieobjecten
-    from app.models import AgendapuntInformatieObjectLink
-    
-    link1 = AgendapuntInformatieObjectLink(
-        agendapunt_id=agendapunt1.id,
-        informatieobject_id=informatieobject1.id
-    )
-    link2 = AgendapuntInformatieObjectLink(
-        agendapunt_id=agendapunt1.id,
-        informatieobject_id=informatieobject2.id
-    )
-    link3 = AgendapuntInformatieObjectLink(
-        agendapunt_id=agendapunt2.id,
-        informatieobject_id=informatieobject2.id
-    )
-    link4 = AgendapuntInformatieObjectLink(
-        agendapunt_id=agendapunt2.id,
-        informatieobject_id=informatieobject3.id
-    )
-    session.add(link1)
-    session.add(link2)
-    session.add(link3)
-    session.add(link4)
-    session.commit()
+    session.exec(insert(AgendapuntInformatieObjectLink), params=[
+        {"agendapunt_id": agendapunt1.id, "informatieobject_id": informatieobject1.id},
+        {"agendapunt_id": agendapunt1.id, "informatieobject_id": informatieobject2.id},
+        {"agendapunt_id": agendapunt2.id, "informatieobject_id": informatieobject2.id},
+        {"agendapunt_id": agendapunt2.id, "informatieobject_id": informatieobject3.id},
+    ])
     
     # Get vergadering and verify informatieobjecten field
     response = client.get(f"/vergaderingen/{vergadering.pid_uuid}")
     assert response.status_code == 200
-    data = response.json()
-    
-    # Verify informatieobjecten field exists and has all 3 unique objects
-    assert "informatieobjecten" in data
-    assert len(data["informatieobjecten"]) == 3
+    data = _json(response)
     
-    # Verify format of URIs and that all informatieobjecten are present
-    api_server = "http://localhost:8000"
-    expected_uuids = {info_uuid1, info_uuid2, info_uuid3}
-    found_uuids = set()
-    
-    for uri in data["informatieobjecten"]:
-        assert uri.startswith(f"{api_server}/informatieobjecten/")
-        # Extract UUID
-        uri_uuid = uri.split("/")[-1]
-        found_uuids.add(uri_uuid)
-        # Verify it's a valid UUID format
-        uuid.UUID(uri_uuid)
-    
-    # Verify all expected UUIDs are found (no duplicates because it's a set)
-    assert found_uuids == expected_uuids
+    # Verify all three informatieobjecten are listed once, though informatieobject2 is on both agendapunten
+    assert sorted(data["informatieobjecten"]) == sorted(
+        [informatieobject1.pid, informatieobject2.pid, informatieobject3.pid]
+    )
 
 
-def test_informatieobject_includes_vergaderingen_via_agendapunten(session: Session, client: TestClient):
+def test_informatieobject_includes_vergaderingen_via_agendapunten(
+    session: Session, client: TestClient, vergadering_with_agendapunten
+):
     """Test that an informatieobject response includes vergaderingen via its agendapunten."""
-    # Create 2 vergaderingen
-    verg_uuid1 = str(uuid.uuid4())
-    verg_uuid2 = str(uuid.uuid4())
-    vergadering1 = VergaderingDB(
-        pid=f"http://localhost:8000/vergaderingen/{verg_uuid1}",
-        pid_uuid=verg_uuid1,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="vergadering",
-        naam="Raadsvergadering 1",
-    )
-    vergadering2 = VergaderingDB(
-        pid=f"http://localhost:8000/vergaderingen/{verg_uuid2}",
-        pid_uuid=verg_uuid2,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="vergadering",
-        naam="Raadsvergadering 2",
-    )
-    session.add(vergadering1)
-    session.add(vergadering2)
-    session.commit()
-    session.refresh(vergadering1)
-    session.refresh(vergadering2)
-    
-    # Create 3 agendapunten - 2 for vergadering1, 1 for vergadering2
-    agp_uuid1 = str(uuid.uuid4())
-    agp_uuid2 = str(uuid.uuid4())
-    agp_uuid3 = str(uuid.uuid4())
-    agendapunt1 = AgendapuntDB(
-        pid=f"http://localhost:8000/agendapunten/{agp_uuid1}",
-        pid_uuid=agp_uuid1,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="agendapunt",
-        agendapuntnaam="Agendapunt 1",
-        vergadering_id=vergadering1.id,
-    )
-    agendapunt2 = AgendapuntDB(
-        pid=f"http://localhost:8000/agendapunten/{agp_uuid2}",
-        pid_uuid=agp_uuid2,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="agendapunt",
-        agendapuntnaam="Agendapunt 2",
-        vergadering_id=vergadering1.id,
-    )
-    agendapunt3 = AgendapuntDB(
-        pid=f"http://localhost:8000/agendapunten/{agp_uuid3}",
-        pid_uuid=agp_uuid3,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="agendapunt",
-        agendapuntnaam="Agendapunt 3",
-        vergadering_id=vergadering2.id,
-    )
-    session.add(agendapunt1)
-    session.add(agendapunt2)
-    session.add(agendapunt3)
-    session.commit()
-    session.refresh(agendapunt1)
-    session.refresh(agendapunt2)
-    session.refresh(agendapunt3)
+    # Create 2 vergaderingen with 3 agendapunten - 2 for vergadering1, 1 for vergadering2
+    vergadering1, (agendapunt1, agendapunt2) = vergadering_with_agendapunten(2)
+    vergadering2, (agendapunt3,) = vergadering_with_agendapunten(1)
     
     # Create informatieobject
-    info_uuid = str(uuid.uuid4())
-    informatieobject = InformatieObjectDB(
-        pid=f"http://localhost:8000/informatieobjecten/{info_uuid}",
-        pid_uuid=info_uuid,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        titel="Document 1",
-        wooinformatiecategorie="c_db4862c3",
-        datumingediend=date(2017, 2, 9),
+    informatieobject = make_informatieobject(
+        "Document 1",
         webpaginalink="https://example.com/doc1",
     )
+    # Flush once for the ids the link rows need
     session.add(informatieobject)
-    session.commit()
-    session.refresh(informatieobject)
+    session.flush()
     
     # Link informatieobject to all 3 agendapunten (2 from vergadering1, 1 from vergadering2)
-    from app.models import AgendapuntInformatieObjectLink
-    
-    link1 = AgendapuntInformatieObjectLink(
-        agendapunt_id=agendapunt1.id,
-        informatieobject_id=informatieobject.id
-    )
-    link2 = AgendapuntInformatieObjectLink(
-        agendapunt_id=agendapunt2.id,
-        informatieobject_id=informatieobject.id
-    )
-    link3 = AgendapuntInformatieObjectLink(
-        agendapunt_id=agendapunt3.id,
-        informatieobject_id=informatieobject.id
-    )
-    session.add(link1)
-    session.add(link2)
-    session.add(link3)
-    session.commit()
+    session.exec(insert(AgendapuntInformatieObjectLink), params=[
+        {"agendapunt_id": agendapunt.id, "informatieobject_id": informatieobject.id}
+        for agendapunt in (agendapunt1, agendapunt2, agendapunt3)
+    ])
     
     # Get informatieobject and verify vergaderingen field
     response = client.get(f"/informatieobjecten/{informatieobject.pid_uuid}")
     assert response.status_code == 200
-    data = response.json()
-    
-    # Verify vergaderingen field exists and has both vergaderingen
-    assert "vergaderingen" in data
-    assert data["vergaderingen"] is not None
-    assert len(data["vergaderingen"]) == 2
+    data = _json(response)
     
-    # Verify format of references and that both vergaderingen are present
-    api_server = "http://localhost:8000"
-    expected_uuids = {verg_uuid1, verg_uuid2}
-    found_uuids = set()
-    
-    for ref in data["vergaderingen"]:
-        assert "id" in ref
-        assert ref["id"].startswith(f"{api_server}/vergaderingen/")
-        # Extract UUID
-        ref_uuid = ref["id"].split("/")[-1]
-        found_uuids.add(ref_uuid)
-        # Verify it's a valid UUID format
-        uuid.UUID(ref_uuid)
-    
-    # Verify both expected vergaderingen are found
-    assert found_uuids == expected_uuids
+    # Verify both vergaderingen are referenced once, though vergadering1 has two of the agendapunten
+    assert sorted(ref["id"] for ref in data["vergaderingen"]) == sorted([vergadering1.pid, vergadering2.pid])
     
     # Also verify agendapunten are present
     assert "agendapunten" in data
@@ -686,147 +731,80 @@ def test_informatieobject_includes_vergaderingen_via_agendapunten(session: Sessi
     assert len(data["agendapunten"]) == 3
 
 
-def test_post_informatieobject_with_vergadering_reference(session: Session, client: TestClient):
+def test_post_informatieobject_with_vergadering_reference(
+    session: Session, client: TestClient, vergadering_with_agendapunten
+):
     """Test that posting an informatieobject with vergadering reference links to vergadering's agendapunten."""
-    # Create vergadering
-    verg_uuid = str(uuid.uuid4())
-    vergadering = VergaderingDB(
-        pid=f"http://localhost:8000/vergaderingen/{verg_uuid}",
-        pid_uuid=verg_uuid,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="vergadering",
-        naam="Raadsvergadering",
-    )
-    session.add(vergadering)
-    session.commit()
-    session.refresh(vergadering)
-    
-    # Create 2 agendapunten for this vergadering
-    agp_uuid1 = str(uuid.uuid4())
-    agp_uuid2 = str(uuid.uuid4())
-    agendapunt1 = AgendapuntDB(
-        pid=f"http://localhost:8000/agendapunten/{agp_uuid1}",
-        pid_uuid=agp_uuid1,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="agendapunt",
-        agendapuntnaam="Agendapunt 1",
-        vergadering_id=vergadering.id,
-    )
-    agendapunt2 = AgendapuntDB(
-        pid=f"http://localhost:8000/agendapunten/{agp_uuid2}",
-        pid_uuid=agp_uuid2,
-        organisatie_type="gemeente",
-        organisatie_code="gm0363",
-        organisatie_naam="Gemeente Amsterdam",
-        dossiertype="agendapunt",
-        agendapuntnaam="Agendapunt 2",
-        vergadering_id=vergadering.id,
-    )
-    session.add(agendapunt1)
-    session.add(agendapunt2)
-    session.commit()
+    # Create vergadering with 2 agendapunten
+    vergadering, (agendapunt1, agendapunt2) = vergadering_with_agendapunten(2)
+    session.flush()
     
     # POST informatieobject with vergadering reference
-    info_data = {
-        "webpaginalink": "https://example.com/doc.pdf",
-        "organisatie": {
-            "gemeente": "gm0363",
-            "naam": "Gemeente Amsterdam"
-        },
-        "titel": "Test Document",
-        "wooinformatiecategorie": "c_db4862c3",
-        "datumingediend": "2017-02-09",
-        "vergaderingen": [{"id": f"http://localhost:8000/vergaderingen/{verg_uuid}"}]
-    }
+    info_data = {**_CREATE_INFORMATIEOBJECT, "vergaderingen": [{"id": vergadering.pid}]}
     
     response = client.post("/informatieobjecten", json=info_data)
     assert response.status_code == 201
-    data = response.json()
-    
-    # Verify vergaderingen in response
-    assert "vergaderingen" in data
-    assert data["vergaderingen"] is not None
-    assert len(data["vergaderingen"]) == 1
-    assert data["vergaderingen"][0]["id"] == f"http://localhost:8000/vergaderingen/{verg_uuid}"
-    
-    # Verify it's linked to both agendapunten
-    assert "agendapunten" in data
-    assert data["agendapunten"] is not None
-    assert len(data["agendapunten"]) == 2
+    data = _json(response)
     
-    # Extract agendapunt UUIDs from response
-    agendapunt_uuids = {ref["id"].split("/")[-1] for ref in data["agendapunten"]}
-    expected_uuids = {agp_uuid1, agp_uuid2}
-    assert agendapunt_uuids == expected_uuids
+    # Verify it's linked to the vergadering and to both of its agendapunten
+    assert data["vergaderingen"] == [{"id": vergadering.pid}]
+    assert sorted(ref["id"] for ref in data["agendapunten"]) == sorted([agendapunt1.pid, agendapunt2.pid])
+
+
+def test_post_informatieobject_with_uppercase_references(
+    session: Session, client: TestClient, vergadering_with_agendapunten
+):
+    """Test that references in uppercase or without dashes are linked, and ones that are no uuid ignored"""
+    vergadering, (agendapunt1, agendapunt2) = vergadering_with_agendapunten(2)
+    session.flush()
+
+    response = client.post("/informatieobjecten", json={
+        **_CREATE_INFORMATIEOBJECT,
+        "vergaderingen": [{"id": vergadering.pid.upper()}],
+        "agendapunten": [{"id": agendapunt1.pid_uuid.upper().replace("-", "")}],
+    })
+    assert response.status_code == 201
+    data = _json(response)
+    assert data["vergaderingen"] == [{"id": vergadering.pid}]
+    assert sorted(ref["id"] for ref in data["agendapunten"]) == sorted([agendapunt1.pid, agendapunt2.pid])
+
+    response = client.post("/informatieobjecten", json={
+        **_CREATE_INFORMATIEOBJECT,
+        "agendapunten": [{"id": "geen-uuid"}],
+    })
+    assert response.status_code == 201
+    assert _json(response)["agendapunten"] is None
 
 
 def test_get_vergadering_shows_linked_informatieobjecten(session: Session, client: TestClient):
     """Test that getting a vergadering shows informatieobjecten linked via agendapunten."""
     # Create vergadering via API
-    verg_data = {
-        "organisatie": {
-            "gemeente": "gm0363",
-            "naam": "Gemeente Amsterdam"
-        },
-        "dossiertype": "vergadering",
-        "naam": "Raadsvergadering"
-    }
-    verg_response = client.post("/vergaderingen", json=verg_data)
+    verg_response = client.post("/vergaderingen", json=_CREATE_VERGADERING)
     assert verg_response.status_code == 201
-    verg = verg_response.json()
+    verg = _json(verg_response)
     verg_uuid = verg["pid_uuid"]
     
     # Create 2 agendapunten for this vergadering via API
-    agp1_data = {
-        "organisatie": {
-            "gemeente": "gm0363",
-            "naam": "Gemeente Amsterdam"
-        },
-        "dossiertype": "agendapunt",
-        "agendapuntnaam": "Agendapunt 1",
-        "vergadering": {"id": f"http://localhost:8000/vergaderingen/{verg_uuid}"}
-    }
+    agp1_data = {**_CREATE_AGENDAPUNT, "agendapuntnaam": "Agendapunt 1", "vergadering": {"id": verg["pid"]}}
     agp1_response = client.post("/agendapunten", json=agp1_data)
     assert agp1_response.status_code == 201
-    agp1 = agp1_response.json()
+    agp1 = _json(agp1_response)
     
-    agp2_data = {
-        "organisatie": {
-            "gemeente": "gm0363",
-            "naam": "Gemeente Amsterdam"
-        },
-        "dossiertype": "agendapunt",
-        "agendapuntnaam": "Agendapunt 2",
-        "vergadering": {"id": f"http://localhost:8000/vergaderingen/{verg_uuid}"}
-    }
+    agp2_data = {**_CREATE_AGENDAPUNT, "agendapuntnaam": "Agendapunt 2", "vergadering": {"id": verg["pid"]}}
     agp2_response = client.post("/agendapunten", json=agp2_data)
     assert agp2_response.status_code == 201
-    agp2 = agp2_response.json()
+    agp2 = _json(agp2_response)
     
     # Create informatieobject linked to agendapunt 1
-    info_data = {
-        "webpaginalink": "https://example.com/doc.pdf",
-        "organisatie": {
-            "gemeente": "gm0363",
-            "naam": "Gemeente Amsterdam"
-        },
-        "titel": "Test Document",
-        "wooinformatiecategorie": "c_db4862c3",
-        "datumingediend": "2017-02-09",
-        "agendapunten": [{"id": agp1["pid"]}]
-    }
+    info_data = {**_CREATE_INFORMATIEOBJECT, "agendapunten": [{"id": agp1["pid"]}]}
     info_response = client.post("/informatieobjecten", json=info_data)
     assert info_response.status_code == 201
-    info = info_response.json()
+    info = _json(info_response)
     
     # Now GET the vergadering and verify informatieobjecten are included
     get_response = client.get(f"/vergaderingen/{verg_uuid}")
     assert get_response.status_code == 200
-    data = get_response.json()
+    data = _json(get_response)
     
     # Verify agendapunten are present
     assert "agendapunten" in data